@@ -0,0 +1,129 @@
+import asyncio
+import gzip
+import os
+from datetime import datetime
+from typing import List, Optional
+from bson import json_util
+from pymongo import UpdateOne
+from app.db import id_filter, insert_new
+
+
+# Set on a competition once any of its documents went to the archive store; reads
+# that merge archived documents back in skip the store for competitions without it
+ARCHIVED_FLAG = "archived_at"
+
+
+def archive_collection(collection: str) -> str:
+    return f"{collection}_archive"
+
+
+async def mark_archived(db, competition_id: str):
+    await db["competitions"].update_one(id_filter(competition_id), {"$set": {ARCHIVED_FLAG: datetime.utcnow()}})
+
+
+async def archived_fixtures(db, archive, competition: dict) -> List[dict]:
+    """Completed fixtures of a competition's archived seasons, without touching the store if it has none."""
+    if not competition.get(ARCHIVED_FLAG):
+        return []
+    docs = await archive.find_competition(db, "fixtures", str(competition["_id"]))
+    return [doc for doc in docs if doc.get("is_complete")]
+
+
+class CollectionArchive:
+    """Keeps archived documents in a ``<collection>_archive`` twin of each collection."""
+
+    async def write(self, db, collection: str, competition_id: str, docs: List[dict]):
+        await insert_new(db[archive_collection(collection)], docs)
+
+    async def find(self, db, collection: str, doc_id: str) -> Optional[dict]:
+        return await db[archive_collection(collection)].find_one(id_filter(doc_id))
+
+    async def find_competition(self, db, collection: str, competition_id: str) -> List[dict]:
+        return [doc async for doc in db[archive_collection(collection)].find({"competition_id": competition_id})]
+
+    async def archived_competitions(self, db, collection: str) -> List[str]:
+        return [cid for cid in await db[archive_collection(collection)].distinct("competition_id") if cid]
+
+
+class FileArchive:
+    """Appends archived documents to gzip-compressed NDJSON files on local disk.
+
+    Each competition gets one ``<collection>/<competition_id>.ndjson.gz`` file per
+    collection; the ``archive_index`` collection maps ``<collection>:<_id>`` of every
+    archived document to its file so single documents can still be read back.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def _path(self, collection: str, competition_id: str) -> str:
+        return os.path.join(self.directory, collection, f"{competition_id}.ndjson.gz")
+
+    def _append(self, path: str, docs: List[dict]):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        lines = "".join(json_util.dumps(doc) + "\n" for doc in docs)
+        # Appending starts a new gzip member; readers see the members as one stream
+        with gzip.open(path, "at", encoding="utf-8") as f:
+            f.write(lines)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _read(self, path: str) -> List[dict]:
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                docs = {}
+                for line in f:
+                    doc = json_util.loads(line)
+                    # A retried batch may have been appended twice
+                    docs[doc["_id"]] = doc
+                return list(docs.values())
+        except FileNotFoundError:
+            return []
+
+    def _scan(self, path: str, doc_id: str) -> Optional[dict]:
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                for line in f:
+                    doc = json_util.loads(line)
+                    if str(doc["_id"]) == doc_id:
+                        return doc
+        except FileNotFoundError:
+            return None
+        return None
+
+    async def write(self, db, collection: str, competition_id: str, docs: List[dict]):
+        path = self._path(collection, competition_id)
+        await asyncio.to_thread(self._append, path, docs)
+        await db["archive_index"].bulk_write([
+            UpdateOne({"_id": f"{collection}:{doc['_id']}"}, {"$set": {"path": path}}, upsert=True)
+            for doc in docs
+        ], ordered=False)
+
+    async def find(self, db, collection: str, doc_id: str) -> Optional[dict]:
+        entry = await db["archive_index"].find_one({"_id": f"{collection}:{doc_id}"})
+        if not entry:
+            return None
+        return await asyncio.to_thread(self._scan, entry["path"], doc_id)
+
+    async def find_competition(self, db, collection: str, competition_id: str) -> List[dict]:
+        return await asyncio.to_thread(self._read, self._path(collection, competition_id))
+
+    async def archived_competitions(self, db, collection: str) -> List[str]:
+        try:
+            names = await asyncio.to_thread(os.listdir, os.path.join(self.directory, collection))
+        except FileNotFoundError:
+            return []
+        suffix = ".ndjson.gz"
+        return [name[:-len(suffix)] for name in names if name.endswith(suffix)]
+
+
+async def backfill_archived_flags(db, archive) -> dict:
+    """Flag competitions archived before ``ARCHIVED_FLAG`` existed, so their standings keep archived fixtures."""
+    competition_ids = await archive.archived_competitions(db, "fixtures")
+    for competition_id in competition_ids:
+        await mark_archived(db, competition_id)
+    return {"competitions": len(competition_ids)}
+
+
+def create_archive(directory: str):
+    return FileArchive(directory) if directory else CollectionArchive()
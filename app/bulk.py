@@ -0,0 +1,87 @@
+import csv
+import io
+import json
+from typing import Callable, List, Optional, Tuple, Type
+from fastapi import HTTPException, Request
+from pydantic import BaseModel, ValidationError
+from pymongo.errors import BulkWriteError
+from app.models import BulkItemResult, BulkResult, nullable_fields
+
+MAX_BULK_ITEMS = 5000
+
+
+def _csv_value(value: str):
+    # Nested fields (e.g. a fixture's teams) are written as JSON inside the cell
+    value = value.strip()
+    if value == "":
+        return None
+    if value[0] in "[{":
+        return json.loads(value)
+    return value
+
+
+async def read_items(request: Request) -> List[dict]:
+    """Parse a bulk request body: a JSON array, NDJSON or CSV with a header row."""
+    content_type = request.headers.get("content-type", "application/json").split(";")[0].strip()
+    try:
+        body = (await request.body()).decode("utf-8-sig")
+        if content_type in ("application/x-ndjson", "application/ndjson"):
+            items = [json.loads(line) for line in body.splitlines() if line.strip()]
+        elif content_type == "text/csv":
+            items = [{k: _csv_value(v or "") for k, v in row.items()} for row in csv.DictReader(io.StringIO(body))]
+        else:
+            items = json.loads(body)
+    except (ValueError, csv.Error) as exc:
+        # UnicodeDecodeError and json.JSONDecodeError are ValueErrors
+        raise HTTPException(status_code=400, detail=f"Could not parse {content_type} body: {exc}")
+
+    if not isinstance(items, list) or not all(isinstance(item, dict) for item in items):
+        raise HTTPException(status_code=400, detail="Expected a list of objects")
+    if len(items) > MAX_BULK_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BULK_ITEMS} items per request")
+    return items
+
+
+async def bulk_insert(
+    request: Request,
+    collection,
+    model: Type[BaseModel],
+    prepare: Optional[Callable[[dict], dict]] = None,
+) -> Tuple[BulkResult, List[dict]]:
+    """Validate every item of a bulk request and insert the valid ones unordered.
+
+    Returns the per-item result and the documents that were written, so callers
+    can run follow-up writes (memberships, standings) for them in bulk.
+    """
+    items = await read_items(request)
+    results = [BulkItemResult(index=i) for i in range(len(items))]
+
+    # Rows may leave out nullable columns such as id; only the columns a row sent are written
+    missing_ok = dict.fromkeys(nullable_fields(model))
+    pending = []
+    for index, item in enumerate(items):
+        try:
+            doc = model(**{**missing_ok, **item}).dict(include=set(item) - {"id"})
+        except ValidationError as exc:
+            results[index].error = "; ".join(
+                f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in exc.errors()
+            )
+            continue
+        pending.append((index, prepare(doc) if prepare else doc))
+
+    failed_positions = {}
+    if pending:
+        try:
+            await collection.insert_many([doc for _, doc in pending], ordered=False)
+        except BulkWriteError as exc:
+            failed_positions = {err["index"]: err["errmsg"] for err in exc.details["writeErrors"]}
+
+    inserted = []
+    for position, (index, doc) in enumerate(pending):
+        if position in failed_positions:
+            results[index].error = failed_positions[position]
+        else:
+            results[index].id = str(doc["_id"])
+            inserted.append(doc)
+
+    return BulkResult(inserted=len(inserted), failed=len(items) - len(inserted), results=results), inserted
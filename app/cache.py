@@ -0,0 +1,169 @@
+import json
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional
+from fastapi import Request, Response
+from app.etag import PASSTHROUGH_HEADERS, render_json, with_etag
+
+# Seconds a cached response stays valid, per resource
+DEFAULT_TTLS = {
+    "competition": 60,
+    "league_table": 10,
+    "profile": 300,
+    "membership": 30,
+    "standings": 300,
+}
+
+
+class MemoryCache:
+    """In-process LRU cache with per-entry TTLs.
+
+    Namespace counters live outside the LRU so evicting entries can never reset
+    a generation and resurrect stale data.
+    """
+
+    def __init__(self, max_entries: int = 2048):
+        self.max_entries = max_entries
+        self.evictions = 0
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._counters: Dict[str, int] = {}
+
+    async def get(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def get_many(self, keys: List[str]) -> List[Optional[str]]:
+        return [await self.get(key) for key in keys]
+
+    async def set(self, key: str, value: str, ttl: float):
+        self._entries[key] = (value, time.monotonic() + ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def set_many(self, items: Dict[str, str], ttl: float):
+        for key, value in items.items():
+            await self.set(key, value, ttl)
+
+    async def incr(self, key: str) -> int:
+        self._counters[key] = self._counters.get(key, 0) + 1
+        return self._counters[key]
+
+    async def get_counters(self, keys: List[str]) -> List[int]:
+        return [self._counters.get(key, 0) for key in keys]
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class RedisCache:
+    """Backend for any Redis-compatible asyncio client (redis.asyncio, fakeredis, ...)."""
+
+    def __init__(self, client, prefix: str = "fm:"):
+        self.client = client
+        self.prefix = prefix
+        self.evictions = 0
+
+    async def get(self, key: str) -> Optional[str]:
+        value = await self.client.get(self.prefix + key)
+        return value.decode() if isinstance(value, bytes) else value
+
+    async def get_many(self, keys: List[str]) -> List[Optional[str]]:
+        if not keys:
+            return []
+        values = await self.client.mget([self.prefix + key for key in keys])
+        return [value.decode() if isinstance(value, bytes) else value for value in values]
+
+    async def set(self, key: str, value: str, ttl: float):
+        await self.client.set(self.prefix + key, value, px=int(ttl * 1000))
+
+    async def set_many(self, items: Dict[str, str], ttl: float):
+        if not items:
+            return
+        # MSET can't set expiries, so send one SET per key in a single pipelined round trip
+        async with self.client.pipeline(transaction=False) as pipe:
+            for key, value in items.items():
+                pipe.set(self.prefix + key, value, px=int(ttl * 1000))
+            await pipe.execute()
+
+    async def incr(self, key: str) -> int:
+        return await self.client.incr(self.prefix + "gen:" + key)
+
+    async def get_counters(self, keys: List[str]) -> List[int]:
+        if not keys:
+            return []
+        values = await self.client.mget([self.prefix + "gen:" + key for key in keys])
+        return [int(value or 0) for value in values]
+
+    def __len__(self):
+        return 0
+
+
+class ResponseCache:
+    def __init__(self, backend, ttls: Optional[Dict[str, float]] = None):
+        self.backend = backend
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    async def key(self, resource: str, namespaces: List[str], request: Request) -> str:
+        generations = await self.backend.get_counters(namespaces)
+        params = "&".join(f"{k}={v}" for k, v in sorted(request.query_params.multi_items()))
+        stamp = ",".join(f"{ns}@{gen}" for ns, gen in zip(namespaces, generations))
+        return f"{resource}|{stamp}|{request.url.path}?{params}"
+
+    async def invalidate(self, *namespaces: str):
+        for namespace in namespaces:
+            await self.backend.incr(namespace)
+        self.invalidations += 1
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.backend.evictions,
+            "invalidations": self.invalidations,
+            "entries": len(self.backend),
+        }
+
+
+async def cached(
+    request: Request,
+    response: Response,
+    resource: str,
+    namespaces: Iterable[str],
+    loader: Callable[[], Awaitable],
+) -> Response:
+    """Serve a GET from the response cache, calling ``loader`` on a miss.
+
+    The entry is keyed by route, query parameters and the current generation of
+    each namespace, so ``ResponseCache.invalidate`` on any of them retires it.
+    Entries hold the rendered body and its ETag, so hits skip serialisation.
+    Errors raised by ``loader`` are not cached.
+    """
+    cache: ResponseCache = request.app.state.cache
+    key = await cache.key(resource, list(namespaces), request)
+
+    hit = await cache.backend.get(key)
+    if hit is not None:
+        cache.hits += 1
+        entry = json.loads(hit)
+        return Response(content=entry["body"], media_type="application/json", headers=entry["headers"])
+
+    cache.misses += 1
+    resp = with_etag(render_json(await loader(), response))
+    entry = {
+        "body": resp.body.decode(),
+        "headers": {h: resp.headers[h] for h in PASSTHROUGH_HEADERS if h in resp.headers},
+    }
+    await cache.backend.set(key, json.dumps(entry), cache.ttls.get(resource, 30))
+    return resp
@@ -0,0 +1,112 @@
+from datetime import datetime
+from typing import Awaitable, Callable, List, Optional
+from app.db import id_filter
+from app.archive import mark_archived
+from app.counters import recount
+from app.membership import membership_namespace
+from app.standings import cache_namespaces
+
+CASCADE_BATCH_SIZE = 500
+
+# Collections holding a competition's children, keyed by competition_id
+CHILD_COLLECTIONS = ("fixtures", "scoring_events", "teams", "posts", "media", "league_table", "competition_members")
+
+# Documents that hang off a child rather than the competition: child -> (collection, parent id field)
+DEPENDENTS = {"posts": ("replies", "post_id")}
+
+DELETE_COMPETITION = "delete_competition"
+ARCHIVE_COMPETITION = "archive_competition"
+ARCHIVE_SEASON = "archive_season"
+
+
+async def _drain(
+    queue,
+    job: dict,
+    collection: str,
+    query: dict,
+    archive: bool,
+    on_batch: Optional[Callable[[List[dict]], Awaitable[None]]] = None,
+):
+    """Delete (or move to the archive store) every document matching ``query``, a batch at a time."""
+    db = queue.db
+    while True:
+        cursor = db[collection].find(query).limit(CASCADE_BATCH_SIZE)
+        docs = [doc async for doc in cursor]
+        if not docs:
+            return
+        if on_batch:
+            await on_batch(docs)
+        if archive:
+            await queue.archive.write(db, collection, job["params"]["competition_id"], docs)
+        await db[collection].delete_many({"_id": {"$in": [doc["_id"] for doc in docs]}})
+        await queue.progress(job, collection, len(docs))
+
+
+def _with_dependents(queue, job: dict, collection: str, archive: bool):
+    async def on_batch(docs):
+        if collection in DEPENDENTS:
+            dependent, field = DEPENDENTS[collection]
+            parent_ids = [str(doc["_id"]) for doc in docs]
+            await _drain(queue, job, dependent, {field: {"$in": parent_ids}}, archive)
+        if collection == "competition_members":
+            await queue.cache.invalidate(*{membership_namespace(doc["user_id"]) for doc in docs})
+    return on_batch
+
+
+async def _cascade(queue, job: dict, archive: bool):
+    competition_id = job["params"]["competition_id"]
+
+    for collection in CHILD_COLLECTIONS:
+        on_batch = _with_dependents(queue, job, collection, archive)
+        await _drain(queue, job, collection, {"competition_id": competition_id}, archive, on_batch)
+
+    if archive:
+        await _drain(queue, job, "competitions", id_filter(competition_id), archive)
+    await queue.cache.invalidate(f"competition:{competition_id}", *cache_namespaces(competition_id))
+
+
+async def delete_competition_children(queue, job: dict):
+    await _cascade(queue, job, archive=False)
+
+
+async def archive_competition(queue, job: dict):
+    """Move a competition and everything under it into the archive store."""
+    await _cascade(queue, job, archive=True)
+
+
+async def archive_season(queue, job: dict):
+    """Move a finished season's fixtures, scoring events and posts into the archive store.
+
+    The competition, its teams, standings and members stay in the hot collections;
+    archived fixtures and posts remain readable by id through the archive store.
+    """
+    competition_id = job["params"]["competition_id"]
+    scope = {"competition_id": competition_id}
+    # Flagged first, so standings read the store as soon as anything may be in it
+    await mark_archived(queue.db, competition_id)
+    await _drain(queue, job, "fixtures", {**scope, "is_complete": True}, archive=True)
+    await _drain(queue, job, "scoring_events", scope, archive=True)
+    await _drain(queue, job, "posts", scope, archive=True, on_batch=_with_dependents(queue, job, "posts", archive=True))
+    # Counters and previews describe the hot collections the list routes read
+    await recount(queue.db, competition_id, ["fixtures", "posts"])
+    await queue.cache.invalidate(f"competition:{competition_id}")
+
+
+async def completed_seasons(db, completed_before: datetime) -> List[str]:
+    """Competitions whose fixtures are all complete, the last of them before ``completed_before``."""
+    cursor = db["fixtures"].aggregate([
+        {"$group": {
+            "_id": "$competition_id",
+            "open": {"$sum": {"$cond": ["$is_complete", 0, 1]}},
+            "last": {"$max": "$date_time"},
+        }},
+        {"$match": {"open": 0, "last": {"$lt": completed_before}}},
+    ])
+    return [doc["_id"] async for doc in cursor if doc["_id"]]
+
+
+JOB_HANDLERS = {
+    DELETE_COMPETITION: delete_competition_children,
+    ARCHIVE_COMPETITION: archive_competition,
+    ARCHIVE_SEASON: archive_season,
+}
@@ -0,0 +1,120 @@
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set
+from pymongo import DESCENDING, UpdateOne
+from app.db import id_filter
+
+# Newest child ids kept on each competition, replacing the unbounded id arrays
+LATEST_PREVIEW = 5
+
+# Media.type values and the counter they feed
+MEDIA_RELATIONS = {"photo": "photos", "image": "photos", "video": "videos"}
+
+# Counted relation -> (child collection, extra filter on that collection)
+RELATIONS = {
+    "participants": ("teams", {}),
+    "fixtures": ("fixtures", {}),
+    "posts": ("posts", {}),
+    "photos": ("media", {"type": {"$in": ["photo", "image"]}}),
+    "videos": ("media", {"type": "video"}),
+}
+
+# The id arrays the counters replace; league_table rows mirror the teams, so it is not counted
+LEGACY_ARRAYS = ("participants", "fixtures", "league_table", "posts", "photos", "videos")
+
+
+async def children_added(db, relation: str, docs: Iterable[dict]) -> Set[str]:
+    """Fold newly inserted children into their competitions' counts and previews.
+
+    Returns the ids of the competitions that changed.
+    """
+    added: Dict[str, List[str]] = defaultdict(list)
+    for doc in docs:
+        if doc.get("competition_id"):
+            added[doc["competition_id"]].append(str(doc["_id"]))
+    if not added:
+        return set()
+
+    await db["competitions"].bulk_write([
+        UpdateOne(id_filter(competition_id), {
+            "$inc": {f"counts.{relation}": len(ids), "version": 1},
+            "$push": {f"latest.{relation}": {"$each": ids[::-1][:LATEST_PREVIEW], "$position": 0, "$slice": LATEST_PREVIEW}},
+        })
+        for competition_id, ids in added.items()
+    ], ordered=False)
+    return set(added)
+
+
+async def latest_ids(db, competition_id: str, relation: str) -> List[str]:
+    collection, scope = RELATIONS[relation]
+    cursor = db[collection].find({**scope, "competition_id": competition_id}, {"_id": 1}) \
+        .sort("_id", DESCENDING).limit(LATEST_PREVIEW)
+    return [str(doc["_id"]) async for doc in cursor]
+
+
+async def _recount_one(db, competition_id: str, relation: str, change: int):
+    # The preview is re-read rather than patched, so it stays in _id order whatever left or joined
+    await db["competitions"].update_one(id_filter(competition_id), {
+        "$inc": {f"counts.{relation}": change, "version": 1},
+        "$set": {f"latest.{relation}": await latest_ids(db, competition_id, relation)},
+    })
+
+
+async def child_removed(db, relation: str, doc: dict) -> Set[str]:
+    """Take a deleted child out of its competition's count and rebuild the preview."""
+    competition_id = doc.get("competition_id")
+    if not competition_id:
+        return set()
+    await _recount_one(db, competition_id, relation, -1)
+    return {competition_id}
+
+
+async def child_moved(
+    db, before_relation: Optional[str], before: dict, after_relation: Optional[str], after: dict,
+) -> Set[str]:
+    """Move an updated child between competitions, or between relations such as photos and videos.
+
+    ``before``/``after`` are the child's pre- and post-images, and a relation of None
+    means the child isn't counted. Returns the ids of the competitions that changed.
+    """
+    source = (before.get("competition_id"), before_relation)
+    target = (after.get("competition_id"), after_relation)
+    if source == target:
+        return set()
+    changed = set()
+    for (competition_id, relation), change in ((source, -1), (target, 1)):
+        if competition_id and relation:
+            await _recount_one(db, competition_id, relation, change)
+            changed.add(competition_id)
+    return changed
+
+
+async def recount(db, competition_id: str, relations: Iterable[str] = RELATIONS) -> dict:
+    """Recompute counts and previews from the child collections."""
+    counts, latest = {}, {}
+    for relation in relations:
+        collection, scope = RELATIONS[relation]
+        counts[f"counts.{relation}"] = await db[collection].count_documents({**scope, "competition_id": competition_id})
+        latest[f"latest.{relation}"] = await latest_ids(db, competition_id, relation)
+    await db["competitions"].update_one(id_filter(competition_id), {
+        "$set": {**counts, **latest},
+        "$inc": {"version": 1},
+    })
+    return {key.split(".", 1)[1]: value for key, value in counts.items()}
+
+
+async def competitions_changed(request, competition_ids: Iterable[str]):
+    for competition_id in competition_ids:
+        await request.app.state.cache.invalidate(f"competition:{competition_id}")
+
+
+async def backfill_competition_counters(db) -> dict:
+    """Compute counters for every competition and drop the legacy id arrays."""
+    competitions = 0
+    async for competition in db["competitions"].find({}, {"_id": 1}):
+        await recount(db, str(competition["_id"]))
+        await db["competitions"].update_one(
+            {"_id": competition["_id"]},
+            {"$unset": {field: "" for field in LEGACY_ARRAYS}},
+        )
+        competitions += 1
+    return {"competitions": competitions}
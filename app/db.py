@@ -0,0 +1,116 @@
+from typing import List, Optional, Sequence
+from bson import ObjectId
+from fastapi import HTTPException, Request, Response
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError
+from pymongo.read_preferences import Nearest, Primary, PrimaryPreferred, Secondary, SecondaryPreferred
+from app.settings import Settings
+
+READ_PREFERENCES = {
+    "primary": Primary,
+    "primaryPreferred": PrimaryPreferred,
+    "secondary": Secondary,
+    "secondaryPreferred": SecondaryPreferred,
+    "nearest": Nearest,
+}
+
+
+def create_client(settings: Settings, event_listeners: Sequence = ()) -> AsyncIOMotorClient:
+    return AsyncIOMotorClient(
+        settings.mongo_url,
+        event_listeners=list(event_listeners),
+        maxPoolSize=settings.mongo_max_pool_size,
+        minPoolSize=settings.mongo_min_pool_size,
+        maxIdleTimeMS=settings.mongo_max_idle_time_ms,
+        waitQueueTimeoutMS=settings.mongo_wait_queue_timeout_ms,
+        serverSelectionTimeoutMS=settings.mongo_server_selection_timeout_ms,
+        connectTimeoutMS=settings.mongo_connect_timeout_ms,
+        socketTimeoutMS=settings.mongo_socket_timeout_ms,
+    )
+
+
+def read_preference(settings: Settings):
+    mode = READ_PREFERENCES.get(settings.mongo_read_preference)
+    if mode is None:
+        raise ValueError(f"Unknown read preference {settings.mongo_read_preference!r}")
+    if mode is Primary:
+        return Primary()
+    return mode(max_staleness=settings.mongo_max_staleness_seconds or -1)
+
+
+def id_filter(value: str) -> dict:
+    # Documents inserted through the API get an ObjectId _id, older ones may carry a plain string
+    if ObjectId.is_valid(value):
+        return {"_id": ObjectId(value)}
+    return {"_id": value}
+
+
+async def insert_new(collection, docs: List[dict]):
+    """insert_many that skips documents whose _id is already stored."""
+    try:
+        await collection.insert_many(docs, ordered=False)
+    except BulkWriteError as exc:
+        # A retried job finds the documents it copied before failing already there
+        if any(err["code"] != 11000 for err in exc.details["writeErrors"]):
+            raise
+
+
+def with_id(doc: dict) -> dict:
+    doc["id"] = str(doc["_id"])
+    return doc
+
+
+def version_etag(version: Optional[int]) -> str:
+    return f'"{version or 0}"'
+
+
+def expected_version(request: Request) -> Optional[int]:
+    """The document version a client sent in If-Match, if any."""
+    header = request.headers.get("if-match", "").strip()
+    if not header or header == "*":
+        return None
+    if header.startswith("W/"):
+        header = header[2:]
+    try:
+        return int(header.strip('"'))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="If-Match must be a version ETag")
+
+
+async def update_document(
+    collection,
+    doc_id: str,
+    changes: dict,
+    request: Request,
+    response: Response,
+    detail: str = "Not found",
+    return_document: ReturnDocument = ReturnDocument.AFTER,
+    match: Optional[dict] = None,
+    operators: Optional[dict] = None,
+) -> dict:
+    """Apply ``changes`` with a single find_one_and_update and return the document.
+
+    Every write bumps the document's ``version``, which is sent back as the ETag.
+    When the request carries If-Match the update only applies to that version and
+    a stale version is rejected with 409. ``match`` adds query conditions (e.g. for
+    positional updates) and ``operators`` adds update operators such as ``$push``.
+    """
+    query = {**id_filter(doc_id), **(match or {})}
+    version = expected_version(request)
+    if version is not None:
+        query["version"] = {"$in": [0, None]} if version == 0 else version
+
+    update = {**(operators or {})}
+    update["$inc"] = {**update.get("$inc", {}), "version": 1}
+    if changes:
+        update["$set"] = changes
+    doc = await collection.find_one_and_update(query, update, return_document=return_document)
+    if not doc:
+        if version is not None and await collection.count_documents(id_filter(doc_id), limit=1):
+            raise HTTPException(status_code=409, detail="Document was modified by another request")
+        raise HTTPException(status_code=404, detail=detail)
+
+    new_version = doc.get("version", 0) + (0 if return_document == ReturnDocument.AFTER else 1)
+    response.headers["ETag"] = version_etag(new_version)
+    return doc
@@ -0,0 +1,50 @@
+import hashlib
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from app.metrics import measure_serialisation
+
+# Headers a handler may set on the injected Response that must survive rendering
+PASSTHROUGH_HEADERS = ("X-Next-Cursor", "ETag")
+
+
+def content_etag(body: bytes) -> str:
+    return 'W/"%s"' % hashlib.blake2b(body, digest_size=12).hexdigest()
+
+
+def render_json(result, response: Response) -> Response:
+    if isinstance(result, Response):
+        return result
+    headers = {h: response.headers[h] for h in PASSTHROUGH_HEADERS if h in response.headers}
+    with measure_serialisation():
+        return JSONResponse(jsonable_encoder(result), headers=headers)
+
+
+def with_etag(resp: Response) -> Response:
+    """Make sure ``resp`` carries an ETag, hashing the body when no version ETag was set."""
+    if "etag" not in resp.headers:
+        resp.headers["ETag"] = content_etag(resp.body)
+    return resp
+
+
+def _opaque(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return _opaque(etag) in {_opaque(tag) for tag in header.split(",")}
+
+
+def conditional(request: Request, response: Response, result) -> Response:
+    """Render a GET result with an ETag, answering 304 if the client already has it."""
+    resp = with_etag(render_json(result, response))
+    if etag_matches(request, resp.headers["etag"]):
+        headers = {h: resp.headers[h] for h in PASSTHROUGH_HEADERS if h in resp.headers}
+        return Response(status_code=304, headers=headers)
+    return resp
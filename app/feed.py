@@ -0,0 +1,110 @@
+import asyncio
+import base64
+import heapq
+import json
+from datetime import datetime
+from typing import List, Optional, Tuple
+from bson import ObjectId
+from fastapi import HTTPException
+from pymongo import DESCENDING
+from app.models import FeedItem, Fixture, Media, Post
+
+DEFAULT_FEED_LIMIT = 20
+MAX_FEED_LIMIT = 100
+
+# Item type -> (collection, timestamp field, extra filter, projection, model)
+FEED_SOURCES = {
+    "fixture": ("fixtures", "date_time", {"is_complete": True}, None, Fixture),
+    "media": ("media", "date", {}, None, Media),
+    "post": ("posts", "date", {}, {"replies": 0}, Post),
+}
+
+
+def _id_key(_id) -> Tuple[bool, str]:
+    # Same order MongoDB uses within a collection: strings before ObjectIds, ObjectIds by hex
+    return isinstance(_id, ObjectId), str(_id)
+
+
+def item_key(item_type: str, doc: dict):
+    """Feed order, newest first: timestamp, then item type, then _id."""
+    return doc[FEED_SOURCES[item_type][1]], item_type, _id_key(doc["_id"])
+
+
+def encode_feed_cursor(item_type: str, doc: dict) -> str:
+    payload = {
+        "v": doc[FEED_SOURCES[item_type][1]].isoformat(),
+        "t": item_type,
+        "id": str(doc["_id"]),
+        "oid": isinstance(doc["_id"], ObjectId),
+    }
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+def decode_feed_cursor(token: str):
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token.encode()))
+        _id = ObjectId(payload["id"]) if payload["oid"] else payload["id"]
+        if payload["t"] not in FEED_SOURCES:
+            raise ValueError(payload["t"])
+        return datetime.fromisoformat(payload["v"]), payload["t"], _id
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def stream_query(item_type: str, competition_id: str, cursor) -> dict:
+    """Filter for one (competition, item type) stream, resuming strictly after ``cursor``."""
+    _, field, extra, _, _ = FEED_SOURCES[item_type]
+    query = {"competition_id": competition_id, **extra}
+    if cursor is None:
+        return query
+    at, cursor_type, cursor_id = cursor
+    if item_type < cursor_type:
+        query[field] = {"$lte": at}
+    elif item_type > cursor_type:
+        query[field] = {"$lt": at}
+    else:
+        query["$or"] = [{field: {"$lt": at}}, {field: at, "_id": {"$lt": cursor_id}}]
+    return query
+
+
+async def read_stream(db, item_type: str, competition_id: str, cursor, limit: int) -> List[Tuple]:
+    collection, field, _, projection, _ = FEED_SOURCES[item_type]
+    docs = await db[collection].find(
+        stream_query(item_type, competition_id, cursor), projection,
+    ).sort([(field, DESCENDING), ("_id", DESCENDING)]).limit(limit).to_list(length=limit)
+    return [(item_key(item_type, doc), item_type, doc) for doc in docs]
+
+
+async def build_feed(db, user_id: str, limit: int, after: Optional[str] = None) -> Tuple[List[FeedItem], Optional[str]]:
+    """Newest posts, media and results across a user's competitions.
+
+    Each (competition, item type) pair is its own sorted stream read from an index,
+    and no stream can contribute more than a page, so the work per request is
+    bounded by ``limit`` times the number of streams rather than by total content.
+    The streams are k-way merged on (timestamp, type, _id).
+    """
+    cursor = decode_feed_cursor(after) if after else None
+    memberships = db["competition_members"].find({"user_id": user_id}, {"competition_id": 1})
+    competition_ids = {m["competition_id"] async for m in memberships}
+
+    streams = await asyncio.gather(*(
+        read_stream(db, item_type, competition_id, cursor, limit + 1)
+        for competition_id in competition_ids
+        for item_type in FEED_SOURCES
+    ))
+    merged = heapq.merge(*streams, key=lambda entry: entry[0], reverse=True)
+
+    items, last = [], None
+    for _, item_type, doc in merged:
+        if len(items) == limit:
+            return items, encode_feed_cursor(*last)
+        last = (item_type, doc)
+        doc["id"] = str(doc["_id"])
+        model = FEED_SOURCES[item_type][4]
+        items.append(FeedItem(
+            type=item_type,
+            date=doc[FEED_SOURCES[item_type][1]],
+            competition_id=doc["competition_id"],
+            **{item_type: model(**doc)},
+        ))
+    return items, None
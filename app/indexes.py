@@ -0,0 +1,133 @@
+import logging
+from typing import Dict, List
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+from app.archive import archive_collection
+
+logger = logging.getLogger(__name__)
+
+# Every index the routers rely on, per collection. List endpoints page on
+# (sort field, _id), so those indexes end in _id.
+INDEXES: Dict[str, List[IndexModel]] = {
+    "competition_members": [
+        IndexModel([("competition_id", ASCENDING), ("user_id", ASCENDING)], unique=True, name="competition_user_unique"),
+        IndexModel([("user_id", ASCENDING), ("_id", ASCENDING)], name="user_id"),
+        IndexModel([("user_id", ASCENDING), ("joined_at", ASCENDING), ("_id", ASCENDING)], name="user_joined_at"),
+        IndexModel([("user_id", ASCENDING), ("role", ASCENDING), ("_id", ASCENDING)], name="user_role"),
+        IndexModel([("competition_id", ASCENDING), ("joined_at", ASCENDING), ("_id", ASCENDING)], name="competition_joined_at"),
+    ],
+    "profiles": [
+        IndexModel([("user_id", ASCENDING)], unique=True, name="user_id_unique"),
+        IndexModel([("email", ASCENDING)], name="email"),
+        IndexModel([("search_keys", ASCENDING)], name="search_keys"),
+    ],
+    "competitions": [
+        IndexModel([("owner_id", ASCENDING), ("_id", ASCENDING)], name="owner_id"),
+    ],
+    "fixtures": [
+        IndexModel([("competition_id", ASCENDING), ("date_time", ASCENDING), ("_id", ASCENDING)], name="competition_date_time"),
+        IndexModel([("date_time", ASCENDING), ("_id", ASCENDING)], name="date_time"),
+        IndexModel([("competition_id", ASCENDING), ("is_complete", ASCENDING)], name="competition_is_complete"),
+    ],
+    "league_table": [
+        IndexModel([("competition_id", ASCENDING), ("team_id", ASCENDING)], unique=True, name="competition_team_unique"),
+    ],
+    "teams": [
+        IndexModel([("competition_id", ASCENDING), ("_id", ASCENDING)], name="competition_id"),
+    ],
+    "posts": [
+        IndexModel([("competition_id", ASCENDING), ("date", DESCENDING), ("_id", DESCENDING)], name="competition_date"),
+        IndexModel([("date", DESCENDING), ("_id", DESCENDING)], name="date"),
+    ],
+    "media": [
+        IndexModel([("competition_id", ASCENDING), ("date", DESCENDING), ("_id", DESCENDING)], name="competition_date"),
+        IndexModel([("date", DESCENDING), ("_id", DESCENDING)], name="date"),
+    ],
+    "jobs": [
+        IndexModel([("status", ASCENDING), ("run_after", ASCENDING)], name="status_run_after"),
+        IndexModel([("created_at", DESCENDING), ("_id", DESCENDING)], name="created_at"),
+    ],
+    "replies": [
+        IndexModel([("date", DESCENDING), ("_id", DESCENDING)], name="date"),
+        IndexModel([("post_id", ASCENDING), ("date", ASCENDING), ("_id", ASCENDING)], name="post_date"),
+    ],
+    "scoring_events": [
+        IndexModel([("competition_id", ASCENDING)], name="competition_id"),
+    ],
+}
+
+# Archived children are read back per competition (standings and rebuilds read fixtures)
+INDEXES.update({
+    archive_collection(collection): [IndexModel([("competition_id", ASCENDING)], name="competition_id")]
+    for collection in ("fixtures", "scoring_events", "teams", "posts", "media", "league_table", "competition_members")
+})
+
+
+def _signature(keys, unique) -> tuple:
+    # Directions are compared as stored: 1 == 1.0, and "text", "2dsphere" or "hashed" stay strings
+    return tuple((field, direction) for field, direction in keys), bool(unique)
+
+
+async def _index_usage(collection) -> Dict[str, int]:
+    try:
+        stats = await collection.aggregate([{"$indexStats": {}}]).to_list(length=None)
+    except OperationFailure:
+        return {}
+    return {s["name"]: s["accesses"]["ops"] for s in stats}
+
+
+async def index_diff(db) -> Dict[str, dict]:
+    """Compare the declared indexes with those present in the database.
+
+    For every collection reports the declared indexes that are ``missing``, the
+    existing ones that are not declared (``extra``) and existing indexes with no
+    recorded accesses since the server started (``unused``).
+    """
+    report = {}
+    for name, declared in INDEXES.items():
+        collection = db[name]
+        existing = await collection.index_information()
+        existing_signatures = {
+            _signature(info["key"], info.get("unique")): index_name
+            for index_name, info in existing.items()
+            if index_name != "_id_"
+        }
+        declared_signatures = {
+            _signature(model.document["key"].items(), model.document.get("unique")): model.document["name"]
+            for model in declared
+        }
+        usage = await _index_usage(collection)
+        report[name] = {
+            "missing": [n for sig, n in declared_signatures.items() if sig not in existing_signatures],
+            "extra": [n for sig, n in existing_signatures.items() if sig not in declared_signatures],
+            "unused": sorted(n for n, ops in usage.items() if ops == 0 and n != "_id_"),
+        }
+    return report
+
+
+async def ensure_indexes(db, dry_run: bool = False) -> Dict[str, dict]:
+    report = await index_diff(db)
+    if dry_run:
+        return report
+
+    for name, declared in INDEXES.items():
+        missing = [m for m in declared if m.document["name"] in report[name]["missing"]]
+        created, errors = [], {}
+        # One at a time, so an index that cannot be built does not hold back the others
+        for model in missing:
+            index_name = model.document["name"]
+            try:
+                await db[name].create_indexes([model])
+            except OperationFailure as exc:
+                # e.g. existing duplicates blocking a unique index; keep serving and report it
+                logger.warning("Could not create index %s on %s: %s", index_name, name, exc)
+                errors[index_name] = str(exc)
+                continue
+            logger.info("Created index %s on %s", index_name, name)
+            created.append(index_name)
+        if created:
+            report[name]["created"] = created
+        if errors:
+            report[name]["errors"] = errors
+        report[name]["missing"] = list(errors)
+    return report
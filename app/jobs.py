@@ -0,0 +1,145 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, Optional
+from pymongo import ReturnDocument
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+# A running job whose lease lapses (its worker died) is picked up again
+LEASE_SECONDS = 300
+MAX_RETRY_DELAY_SECONDS = 300
+
+Handler = Callable[["JobQueue", dict], Awaitable[None]]
+
+
+class JobQueue:
+    """Background jobs persisted in the ``jobs`` collection.
+
+    Jobs are claimed atomically, so any number of workers across processes can
+    share the collection. A failing job is retried with exponential backoff up to
+    ``max_attempts`` times; handlers report progress with ``JobQueue.progress``,
+    which also renews the job's lease. Handlers reach the database, response cache
+    and archive store through the queue.
+    """
+
+    def __init__(self, db, cache, archive, handlers: Dict[str, Handler], workers: int = 2, max_attempts: int = 5, poll_interval: float = 1.0):
+        self.db = db
+        self.cache = cache
+        self.archive = archive
+        self.handlers = handlers
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.poll_interval = poll_interval
+        self._wakeup = asyncio.Event()
+        self._tasks = []
+
+    async def enqueue(self, job_type: str, params: dict) -> dict:
+        if job_type not in self.handlers:
+            raise ValueError(f"Unknown job type {job_type}")
+        now = datetime.utcnow()
+        job = {
+            "type": job_type,
+            "params": params,
+            "status": QUEUED,
+            "attempts": 0,
+            "max_attempts": self.max_attempts,
+            "progress": {},
+            "error": None,
+            "created_at": now,
+            "updated_at": now,
+            "run_after": now,
+        }
+        await self.db["jobs"].insert_one(job)
+        self._wakeup.set()
+        return job
+
+    async def progress(self, job: dict, step: str, done: int):
+        await self.db["jobs"].update_one({"_id": job["_id"]}, {
+            "$inc": {f"progress.{step}": done},
+            "$set": {"updated_at": datetime.utcnow(), "lease_until": datetime.utcnow() + timedelta(seconds=LEASE_SECONDS)},
+        })
+
+    async def start(self):
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+
+    async def _claim(self) -> Optional[dict]:
+        now = datetime.utcnow()
+        return await self.db["jobs"].find_one_and_update(
+            {"$or": [
+                {"status": QUEUED, "run_after": {"$lte": now}},
+                {"status": RUNNING, "lease_until": {"$lt": now}},
+            ]},
+            {
+                "$set": {"status": RUNNING, "updated_at": now, "lease_until": now + timedelta(seconds=LEASE_SECONDS)},
+                "$inc": {"attempts": 1},
+            },
+            sort=[("run_after", 1)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def _work(self):
+        while True:
+            try:
+                job = await self._claim()
+                if job is not None:
+                    await self._run(job)
+                    continue
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Job worker failed; polling again")
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _run(self, job: dict):
+        try:
+            await self.handlers[job["type"]](self, job)
+        except asyncio.CancelledError:
+            # Shutting down: leave the job to be reclaimed once its lease lapses
+            raise
+        except Exception as exc:
+            logger.exception("Job %s (%s) failed on attempt %s", job["_id"], job["type"], job["attempts"])
+            now = datetime.utcnow()
+            update = {"error": f"{type(exc).__name__}: {exc}", "updated_at": now}
+            if job["attempts"] >= job["max_attempts"]:
+                update["status"] = FAILED
+            else:
+                update["status"] = QUEUED
+                update["run_after"] = now + timedelta(seconds=min(2 ** job["attempts"], MAX_RETRY_DELAY_SECONDS))
+            await self.db["jobs"].update_one({"_id": job["_id"]}, {"$set": update, "$unset": {"lease_until": ""}})
+            return
+        await self.db["jobs"].update_one({"_id": job["_id"]}, {
+            "$set": {"status": SUCCEEDED, "error": None, "updated_at": datetime.utcnow(), "finished_at": datetime.utcnow()},
+            "$unset": {"lease_until": ""},
+        })
+
+    async def retry(self, job_id) -> Optional[dict]:
+        """Queue a failed job again with a fresh set of attempts."""
+        now = datetime.utcnow()
+        job = await self.db["jobs"].find_one_and_update(
+            {"_id": job_id, "status": FAILED},
+            {"$set": {"status": QUEUED, "attempts": 0, "run_after": now, "updated_at": now}},
+            return_document=ReturnDocument.AFTER,
+        )
+        if job:
+            self._wakeup.set()
+        return job
@@ -0,0 +1,72 @@
+import json
+from typing import Dict, Iterable, List, Optional
+from fastapi import HTTPException, Request
+
+MAX_MEMBERSHIP_CHECKS = 500
+
+
+def membership_namespace(user_id: str) -> str:
+    return f"membership:{user_id}"
+
+
+class MembershipLoader:
+    """Resolves a user's role in competitions, batching and remembering lookups.
+
+    Roles are memoised for the rest of the request and kept in the response
+    cache backend for the ``membership`` TTL; adding or removing a member bumps
+    that user's namespace so stale roles are never served.
+    """
+
+    def __init__(self, request: Request):
+        self.db = request.app.state.db
+        self.cache = request.app.state.cache
+        self._roles: Dict[tuple, Optional[str]] = {}
+
+    async def _cache_keys(self, user_id: str, competition_ids: List[str]) -> List[str]:
+        [generation] = await self.cache.backend.get_counters([membership_namespace(user_id)])
+        return [f"membership:{user_id}@{generation}:{cid}" for cid in competition_ids]
+
+    async def roles(self, user_id: str, competition_ids: Iterable[str]) -> Dict[str, Optional[str]]:
+        wanted = list(dict.fromkeys(competition_ids))
+        missing = [cid for cid in wanted if (user_id, cid) not in self._roles]
+        if missing:
+            keys = dict(zip(missing, await self._cache_keys(user_id, missing)))
+            hits = await self.cache.backend.get_many([keys[cid] for cid in missing])
+            unresolved = []
+            for cid, hit in zip(missing, hits):
+                if hit is None:
+                    unresolved.append(cid)
+                else:
+                    self._roles[(user_id, cid)] = json.loads(hit)
+
+            if unresolved:
+                found = {cid: None for cid in unresolved}
+                cursor = self.db["competition_members"].find(
+                    {"user_id": user_id, "competition_id": {"$in": unresolved}},
+                    {"competition_id": 1, "role": 1},
+                )
+                async for doc in cursor:
+                    found[doc["competition_id"]] = doc.get("role")
+                for cid, role in found.items():
+                    self._roles[(user_id, cid)] = role
+                await self.cache.backend.set_many(
+                    {keys[cid]: json.dumps(role) for cid, role in found.items()},
+                    self.cache.ttls.get("membership", 30),
+                )
+
+        return {cid: self._roles[(user_id, cid)] for cid in wanted}
+
+    async def role(self, user_id: str, competition_id: str) -> Optional[str]:
+        return (await self.roles(user_id, [competition_id]))[competition_id]
+
+    async def require(self, user_id: str, competition_id: str, roles: Optional[Iterable[str]] = None) -> str:
+        """The user's role, or 403 if they are not a member (or not in one of ``roles``)."""
+        role = await self.role(user_id, competition_id)
+        if role is None or (roles is not None and role not in roles):
+            raise HTTPException(status_code=403, detail="Not allowed in this competition")
+        return role
+
+
+def get_memberships(request: Request) -> MembershipLoader:
+    # FastAPI caches dependencies per request, so every user of this in one request shares the loader
+    return MembershipLoader(request)
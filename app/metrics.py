@@ -0,0 +1,224 @@
+import functools
+import inspect
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional, Sequence, Tuple
+from fastapi.routing import APIRoute
+from pymongo import monitoring
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+ROUND_TRIP_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+class RequestTimings:
+    """Time spent by the current request outside the handler's own code."""
+
+    __slots__ = ("db_seconds", "db_round_trips", "serialisation_seconds", "endpoint_returned", "_lock")
+
+    def __init__(self):
+        self.db_seconds = 0.0
+        self.db_round_trips = 0
+        self.serialisation_seconds = 0.0
+        # perf_counter() when the route's endpoint returned, set by TimedRoute
+        self.endpoint_returned: Optional[float] = None
+        # Motor runs commands on executor threads, possibly several at once for one request
+        self._lock = threading.Lock()
+
+    def add_db(self, seconds: float):
+        with self._lock:
+            self.db_seconds += seconds
+            self.db_round_trips += 1
+
+
+_current: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+@contextmanager
+def measure_serialisation():
+    timings = _current.get()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if timings is not None:
+            timings.serialisation_seconds += time.perf_counter() - start
+
+
+def _mark_return(endpoint):
+    # Same signature as the endpoint (functools.wraps), so FastAPI injects the same parameters
+    if inspect.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def marked(*args, **kwargs):
+            result = await endpoint(*args, **kwargs)
+            _endpoint_returned()
+            return result
+    else:
+        @functools.wraps(endpoint)
+        def marked(*args, **kwargs):
+            result = endpoint(*args, **kwargs)
+            _endpoint_returned()
+            return result
+    return marked
+
+
+def _endpoint_returned():
+    timings = _current.get()
+    if timings is not None:
+        timings.endpoint_returned = time.perf_counter()
+
+
+class TimedRoute(APIRoute):
+    """Route class charging the time from the endpoint returning to the response
+    being built to serialisation: response_model validation, encoding and rendering.
+
+    Pass it as ``route_class`` to every ``APIRouter``.
+    """
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        super().__init__(path, _mark_return(endpoint), **kwargs)
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+
+        async def timed_handler(request):
+            timings = _current.get()
+            if timings is None:
+                return await handler(request)
+            timings.endpoint_returned = None
+            response = await handler(request)
+            if timings.endpoint_returned is not None:
+                timings.serialisation_seconds += time.perf_counter() - timings.endpoint_returned
+            return response
+
+        return timed_handler
+
+
+class DBTimingListener(monitoring.CommandListener):
+    """Charges every MongoDB round trip to the request that issued it.
+
+    Motor copies the caller's context onto its executor threads, so the
+    request's timings are visible here.
+    """
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        self._record(event)
+
+    def failed(self, event):
+        self._record(event)
+
+    def _record(self, event):
+        timings = _current.get()
+        if timings is not None:
+            timings.add_db(event.duration_micros / 1e6)
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, buckets: Sequence[float]):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+        self._series: Dict[Tuple, list] = {}
+
+    def observe(self, labels: Tuple[Tuple[str, str], ...], value: float):
+        series = self._series.get(labels)
+        if series is None:
+            # one counter per bucket, then +Inf, then the running sum
+            series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help_text}"
+        yield f"# TYPE {self.name} histogram"
+        for labels, series in sorted(self._series.items()):
+            base = ",".join(f'{k}="{v}"' for k, v in labels)
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), series):
+                cumulative += count
+                yield f'{self.name}_bucket{{{base},le="{bound}"}} {cumulative}'
+            yield f"{self.name}_sum{{{base}}} {series[-1]}"
+            yield f"{self.name}_count{{{base}}} {cumulative}"
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.requests: Dict[Tuple, int] = {}
+        self.duration = Histogram("fm_request_duration_seconds", "Total request latency", LATENCY_BUCKETS)
+        self.db_time = Histogram("fm_request_db_seconds", "Time spent waiting on MongoDB per request", LATENCY_BUCKETS)
+        self.db_round_trips = Histogram("fm_request_db_round_trips", "MongoDB commands per request", ROUND_TRIP_BUCKETS)
+        self.serialisation = Histogram("fm_request_serialisation_seconds", "Response model validation and JSON encoding time per request", LATENCY_BUCKETS)
+        self.response_bytes = Histogram("fm_response_bytes", "Response body size", SIZE_BUCKETS)
+
+    def record(self, method: str, route: str, status: int, seconds: float, timings: RequestTimings, size: int):
+        labels = (("method", method), ("route", route))
+        key = (*labels, ("status", str(status)))
+        self.requests[key] = self.requests.get(key, 0) + 1
+        self.duration.observe(labels, seconds)
+        self.db_time.observe(labels, timings.db_seconds)
+        self.db_round_trips.observe(labels, timings.db_round_trips)
+        self.serialisation.observe(labels, timings.serialisation_seconds)
+        self.response_bytes.observe(labels, size)
+
+    def render(self) -> str:
+        lines = ["# HELP fm_requests_total Requests served", "# TYPE fm_requests_total counter"]
+        for labels, count in sorted(self.requests.items()):
+            lines.append("fm_requests_total{%s} %d" % (",".join(f'{k}="{v}"' for k, v in labels), count))
+        for histogram in (self.duration, self.db_time, self.db_round_trips, self.serialisation, self.response_bytes):
+            lines.extend(histogram.render())
+        return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording per-route metrics and logging slow requests.
+
+    Plain ASGI rather than BaseHTTPMiddleware so streaming responses pass
+    through untouched and the timings context reaches the handlers.
+    """
+
+    def __init__(self, app, registry: MetricsRegistry, slow_request_ms: int = 1000):
+        self.app = app
+        self.registry = registry
+        self.slow_request_ms = slow_request_ms
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        token = _current.set(timings)
+        start = time.perf_counter()
+        status, size = 500, 0
+
+        async def send_with_metrics(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            elapsed = time.perf_counter() - start
+            _current.reset(token)
+            route = scope.get("route")
+            path = getattr(route, "path", "unmatched")
+            self.registry.record(scope["method"], path, status, elapsed, timings, size)
+            if elapsed * 1000 >= self.slow_request_ms:
+                logger.warning(
+                    "Slow request %s %s: %.0f ms total, %.0f ms in %d DB round trips, %.0f ms serialising, %d bytes",
+                    scope["method"], scope["path"], elapsed * 1000, timings.db_seconds * 1000,
+                    timings.db_round_trips, timings.serialisation_seconds * 1000, size,
+                )
@@ -1,6 +1,6 @@
-from pydantic import BaseModel, Field
-from typing import List, Optional, Dict
-from datetime import datetime
+from pydantic import BaseModel, Field, create_model, model_validator
+from typing import ClassVar, FrozenSet, List, Literal, Optional, Dict, Type, Union, get_args, get_origin
+from datetime import date, datetime, time
 
 class Rule(BaseModel):
     name: str
@@ -34,6 +34,8 @@ class ScoringEvent(BaseModel):
     points: int
     player: Optional[str]
     time: Optional[str]
+    fixture_id: Optional[str] = None
+    competition_id: Optional[str] = None
 
 class Fixture(BaseModel):
     id: Optional[str]
@@ -44,6 +46,13 @@ class Fixture(BaseModel):
     is_complete: bool
     teams: List[FixtureTeam]
     scoring_events: List[ScoringEvent]
+    round: Optional[int] = None
+
+class FixtureEvent(BaseModel):
+    team_id: str
+    category: str
+    player: Optional[str] = None
+    time: Optional[str] = None
 
 class LeagueTable(BaseModel):
     id: Optional[str]
@@ -59,6 +68,8 @@ class LeagueTable(BaseModel):
     pts: int
 
 class Reply(BaseModel):
+    id: Optional[str] = None
+    post_id: Optional[str] = None
     author: str
     date: datetime
     description: str
@@ -69,7 +80,10 @@ class Post(BaseModel):
     author: str
     date: datetime
     description: str
-    replies: List[Reply]
+    # Replies live in the replies collection; only a count and a preview are kept here
+    replies: List[Reply] = []
+    reply_count: int = 0
+    latest_replies: List[Reply] = []
     media: List[str]
 
 class Media(BaseModel):
@@ -80,6 +94,14 @@ class Media(BaseModel):
     location: Optional[str]
     url: Optional[str]
 
+class FeedItem(BaseModel):
+    type: str
+    date: datetime
+    competition_id: str
+    post: Optional[Post] = None
+    media: Optional[Media] = None
+    fixture: Optional[Fixture] = None
+
 class Profile(BaseModel):
     id: Optional[str]
     user_id: str
@@ -97,6 +119,34 @@ class CompetitionMember(BaseModel):
     role: str
     joined_at: datetime = Field(default_factory=datetime.utcnow)
 
+class MembershipCheck(BaseModel):
+    user_id: str
+    competition_ids: List[str]
+
+class MembershipStatus(BaseModel):
+    is_member: bool
+    role: Optional[str] = None
+
+class MemberProfile(BaseModel):
+    id: Optional[str] = None
+    user_id: str
+    email: Optional[str] = None
+    full_name: Optional[str] = None
+    avatar_url: Optional[str] = None
+
+class MemberListing(BaseModel):
+    id: str
+    competition_id: str
+    user_id: str
+    role: str
+    joined_at: Optional[datetime] = None
+    user: Optional[MemberProfile] = None
+
+class MemberPage(BaseModel):
+    total: int
+    roles: Dict[str, int]
+    members: List[MemberListing]
+
 class Competition(BaseModel):
     id: Optional[str]
     name: str
@@ -109,11 +159,142 @@ class Competition(BaseModel):
     rules: List[Rule]
     scoring_categories: List[ScoringCategory]
     point_accumulation: PointAccumulation
-    participants: List[str] = []
-    fixtures: List[str] = []
-    league_table: List[str] = []
-    posts: List[str] = []
-    photos: List[str] = []
-    videos: List[str] = []
+    counts: Dict[str, int] = {}
+    latest: Dict[str, List[str]] = {}
+    # Applied in order after points when ranking standings
+    tiebreakers: List[Literal["gd", "gf", "w", "head_to_head", "fair_play"]] = ["gd", "gf"]
+    # Penalty points per scoring category for the fair_play tiebreaker, fewer is better
+    fair_play_points: Dict[str, int] = {}
     default_photo_repositories: List[str] = []
     default_video_repositories: List[str] = []
+
+class BulkItemResult(BaseModel):
+    index: int
+    id: Optional[str] = None
+    error: Optional[str] = None
+
+class BulkResult(BaseModel):
+    inserted: int
+    failed: int
+    results: List[BulkItemResult]
+
+class ScheduleRequest(BaseModel):
+    format: Optional[str] = None
+    venues: List[str]
+    start_date: date
+    end_date: Optional[date] = None
+    kickoff: time = time(15, 0)
+    rest_days: int = 0
+    matches_per_venue_per_day: int = 1
+    slot_minutes: int = 120
+    team_ids: Optional[List[str]] = None
+    seed: Optional[int] = None
+
+class ScheduleResult(BaseModel):
+    format: str
+    teams: int
+    rounds: int
+    fixture_count: int
+    first_kickoff: Optional[datetime]
+    last_kickoff: Optional[datetime]
+    fits_window: bool
+    written: bool
+    fixtures: List[Fixture] = []
+    bracket: Optional[List[List[List[str]]]] = None
+
+class ProfileSummary(BaseModel):
+    user_id: str
+    full_name: Optional[str] = None
+    avatar_url: Optional[str] = None
+
+class MemberCompetition(Competition):
+    # Set when listing a member's competitions
+    role: Optional[str] = None
+    joined_at: Optional[datetime] = None
+    # Set when listing with include_members
+    member_count: Optional[int] = None
+    owner: Optional[ProfileSummary] = None
+    member_avatars: Optional[List[ProfileSummary]] = None
+
+class StandingsRow(BaseModel):
+    position: int
+    team_id: str
+    mp: int
+    w: int
+    d: int
+    l: int
+    gf: int
+    ga: int
+    gd: int
+    pts: int
+    fair_play: int
+
+class StandingsTable(BaseModel):
+    competition_id: str
+    round: Optional[int] = None
+    tiebreakers: List[str]
+    rows: List[StandingsRow]
+
+class CompetitionOverview(BaseModel):
+    competition: Competition
+    teams: List[Team]
+    upcoming_fixtures: List[Fixture]
+    recent_fixtures: List[Fixture]
+    standings: List[LeagueTable]
+    latest_posts: List[Post]
+
+class Job(BaseModel):
+    id: Optional[str]
+    type: str
+    params: Dict
+    status: str
+    attempts: int
+    max_attempts: int
+    progress: Dict[str, int] = {}
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+    finished_at: Optional[datetime] = None
+
+
+class PartialModel(BaseModel):
+    # Fields a PATCH may leave out but not set to null, because the full model does not allow it
+    not_null_fields: ClassVar[FrozenSet[str]] = frozenset()
+
+    @model_validator(mode="after")
+    def reject_nulls(self):
+        nulls = sorted(name for name in self.model_fields_set & self.not_null_fields if getattr(self, name) is None)
+        if nulls:
+            raise ValueError(f"{', '.join(nulls)} cannot be null")
+        return self
+
+
+def _nullable(annotation) -> bool:
+    return annotation is type(None) or (get_origin(annotation) is Union and type(None) in get_args(annotation))
+
+
+def nullable_fields(model: Type[BaseModel]) -> FrozenSet[str]:
+    """Fields of ``model`` that accept None (pydantic v2 still requires them when they have no default)."""
+    return frozenset(name for name, field in model.model_fields.items() if _nullable(field.annotation))
+
+
+def partial_model(model: Type[BaseModel]) -> Type[BaseModel]:
+    """Copy of ``model`` with every field optional, for PATCH bodies."""
+    fields = {name: (Optional[field.annotation], None) for name, field in model.model_fields.items()}
+    partial = create_model(f"{model.__name__}Update", __base__=PartialModel, **fields)
+    partial.not_null_fields = frozenset(model.model_fields) - nullable_fields(model)
+    return partial
+
+RuleUpdate = partial_model(Rule)
+ScoringCategoryUpdate = partial_model(ScoringCategory)
+PointAccumulationUpdate = partial_model(PointAccumulation)
+TeamUpdate = partial_model(Team)
+FixtureTeamUpdate = partial_model(FixtureTeam)
+ScoringEventUpdate = partial_model(ScoringEvent)
+FixtureUpdate = partial_model(Fixture)
+LeagueTableUpdate = partial_model(LeagueTable)
+ReplyUpdate = partial_model(Reply)
+PostUpdate = partial_model(Post)
+MediaUpdate = partial_model(Media)
+ProfileUpdate = partial_model(Profile)
+CompetitionUpdate = partial_model(Competition)
@@ -0,0 +1,119 @@
+import base64
+import json
+from datetime import datetime
+from typing import List, Optional, Type
+from bson import ObjectId
+from fastapi import HTTPException, Query, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class PageParams:
+    def __init__(
+        self,
+        limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+        after: Optional[str] = Query(None, description="Cursor returned in the X-Next-Cursor header"),
+        fields: Optional[str] = Query(None, description="Comma separated list of fields to return"),
+    ):
+        self.limit = limit
+        self.after = after
+        self.fields = [f.strip() for f in fields.split(",") if f.strip()] if fields else None
+
+
+def encode_cursor(doc: dict, sort_field: Optional[str] = None) -> str:
+    payload = {"id": str(doc["_id"]), "oid": isinstance(doc["_id"], ObjectId)}
+    if sort_field:
+        value = doc.get(sort_field)
+        payload["v"] = value.isoformat() if isinstance(value, datetime) else value
+        payload["dt"] = isinstance(value, datetime)
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+def decode_cursor(token: str, sort_field: Optional[str] = None):
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token.encode()))
+        _id = ObjectId(payload["id"]) if payload["oid"] else payload["id"]
+        value = None
+        if sort_field:
+            value = datetime.fromisoformat(payload["v"]) if payload["dt"] else payload["v"]
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return _id, value
+
+
+def keyset_query(query: dict, token: Optional[str], sort_field: Optional[str], descending: bool) -> dict:
+    if not token:
+        return query
+    _id, value = decode_cursor(token, sort_field)
+    op = "$lt" if descending else "$gt"
+    if sort_field and value is None:
+        # Missing values sort first ascending and last descending, and never compare greater or less
+        same = {sort_field: None, "_id": {op: _id}}
+        after = same if descending else {"$or": [{sort_field: {"$ne": None}}, same]}
+    elif sort_field:
+        after = {"$or": [
+            {sort_field: {op: value}},
+            {sort_field: value, "_id": {op: _id}},
+        ]}
+        if descending:
+            after["$or"].append({sort_field: None})
+    else:
+        after = {"_id": {op: _id}}
+    return {"$and": [query, after]} if query else after
+
+
+def projection_for(model: Type[BaseModel], fields: Optional[List[str]], sort_field: Optional[str]):
+    if not fields:
+        return None
+    unknown = [f for f in fields if f not in model.__fields__ and f != "id"]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    projection = {f: 1 for f in fields if f != "id"}
+    if sort_field:
+        projection[sort_field] = 1
+    return projection
+
+
+async def paginate(
+    collection,
+    query: dict,
+    page: PageParams,
+    model: Type[BaseModel],
+    response: Response,
+    sort_field: Optional[str] = None,
+    descending: bool = False,
+):
+    """Fetch one keyset page of ``collection``.
+
+    Returns a list of ``model`` instances, or a raw JSON response holding only the
+    requested fields when ``page.fields`` is set. The cursor for the following page
+    is returned in the X-Next-Cursor header.
+    """
+    direction = -1 if descending else 1
+    sort = [(sort_field, direction), ("_id", direction)] if sort_field else [("_id", direction)]
+
+    cursor = collection.find(
+        keyset_query(query, page.after, sort_field, descending),
+        projection_for(model, page.fields, sort_field),
+    ).sort(sort).limit(page.limit + 1)
+    docs = await cursor.to_list(length=page.limit + 1)
+
+    headers = {}
+    if len(docs) > page.limit:
+        docs = docs[:page.limit]
+        headers[NEXT_CURSOR_HEADER] = encode_cursor(docs[-1], sort_field)
+
+    for doc in docs:
+        doc["id"] = str(doc["_id"])
+
+    if page.fields:
+        items = [{f: doc.get(f) for f in ["id", *page.fields]} for doc in docs]
+        return JSONResponse(jsonable_encoder(items), headers=headers)
+
+    response.headers.update(headers)
+    return [model(**doc) for doc in docs]
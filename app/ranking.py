@@ -0,0 +1,154 @@
+from typing import Dict, List, Optional
+import numpy as np
+from app.archive import ARCHIVED_FLAG, archived_fixtures
+from app.db import id_filter
+from app.standings import DEFAULT_POINTS
+
+# Tiebreakers a competition may list, applied in order after points
+TIEBREAKERS = ("gd", "gf", "w", "head_to_head", "fair_play")
+# Same order as the stored league table (STANDINGS_SORT)
+DEFAULT_TIEBREAKERS = ["gd", "gf"]
+
+# Fixtures without a round only count towards the full table
+NO_ROUND = np.iinfo(np.int64).max
+
+
+def fixture_arrays(fixtures: List[dict], team_ids: List[str], fair_play_points: Dict[str, int]) -> dict:
+    """Completed two-team fixtures as parallel arrays indexed by position in ``team_ids``."""
+    index = {team_id: i for i, team_id in enumerate(team_ids)}
+    home, away, home_score, away_score, rounds = [], [], [], [], []
+    penalty_team, penalty_points, penalty_round = [], [], []
+    for fixture in fixtures:
+        teams = fixture.get("teams") or []
+        if len(teams) != 2 or teams[0]["team_id"] not in index or teams[1]["team_id"] not in index:
+            continue
+        fixture_round = fixture.get("round") or NO_ROUND
+        home.append(index[teams[0]["team_id"]])
+        away.append(index[teams[1]["team_id"]])
+        home_score.append(teams[0]["score"])
+        away_score.append(teams[1]["score"])
+        rounds.append(fixture_round)
+        for event in fixture.get("scoring_events") or []:
+            points = fair_play_points.get(event.get("category"), 0)
+            if points and event.get("team_id") in index:
+                penalty_team.append(index[event["team_id"]])
+                penalty_points.append(points)
+                penalty_round.append(fixture_round)
+
+    return {
+        "home": np.array(home, dtype=np.int64),
+        "away": np.array(away, dtype=np.int64),
+        "home_score": np.array(home_score, dtype=np.int64),
+        "away_score": np.array(away_score, dtype=np.int64),
+        "round": np.array(rounds, dtype=np.int64),
+        "penalty_team": np.array(penalty_team, dtype=np.int64),
+        "penalty_points": np.array(penalty_points, dtype=np.int64),
+        "penalty_round": np.array(penalty_round, dtype=np.int64),
+    }
+
+
+def table_columns(arrays: dict, n: int, points: dict, mask: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+    """Per-team totals over the fixtures selected by ``mask``, one bincount per column."""
+    home, away = arrays["home"], arrays["away"]
+    home_score, away_score = arrays["home_score"], arrays["away_score"]
+    if mask is not None:
+        home, away, home_score, away_score = home[mask], away[mask], home_score[mask], away_score[mask]
+
+    def per_team(home_values, away_values):
+        return (np.bincount(home, weights=home_values, minlength=n)
+                + np.bincount(away, weights=away_values, minlength=n)).astype(np.int64)
+
+    ones = np.ones(len(home))
+    mp = per_team(ones, ones)
+    w = per_team(home_score > away_score, away_score > home_score)
+    d = per_team(home_score == away_score, home_score == away_score)
+    gf = per_team(home_score, away_score)
+    ga = per_team(away_score, home_score)
+    l = mp - w - d
+    return {
+        "mp": mp, "w": w, "d": d, "l": l, "gf": gf, "ga": ga, "gd": gf - ga,
+        "pts": w * points["win"] + d * points["draw"] + l * points["lose"],
+    }
+
+
+def _criterion_keys(name: str, group: np.ndarray, columns: dict, arrays: dict, mask: np.ndarray, points: dict) -> np.ndarray:
+    # Rows of sort keys for the teams in ``group``, higher is better, first row most significant
+    if name == "fair_play":
+        return -columns["fair_play"][group][np.newaxis]
+    if name == "head_to_head":
+        # A mini league of the matches played among the tied teams: points, then goal difference, then goals
+        among = mask & np.isin(arrays["home"], group) & np.isin(arrays["away"], group)
+        mini = table_columns(arrays, len(columns["pts"]), points, among)
+        return np.stack([mini["pts"][group], mini["gd"][group], mini["gf"][group]])
+    return columns[name][group][np.newaxis]
+
+
+def _order(group: np.ndarray, criteria: List[str], team_ids: List[str], columns: dict, arrays: dict, mask: np.ndarray, points: dict) -> List[int]:
+    if len(group) <= 1 or not criteria:
+        return sorted(group.tolist(), key=lambda i: team_ids[i])
+
+    keys = _criterion_keys(criteria[0], group, columns, arrays, mask, points)
+    # lexsort treats its last key as the primary one
+    order = np.lexsort(-keys[::-1])
+    group, keys = group[order], keys[:, order]
+    boundaries = np.flatnonzero(np.any(keys[:, 1:] != keys[:, :-1], axis=0)) + 1
+
+    ranked = []
+    for tied in np.split(group, boundaries):
+        ranked.extend(_order(tied, criteria[1:], team_ids, columns, arrays, mask, points))
+    return ranked
+
+
+def compute_standings(
+    fixtures: List[dict],
+    team_ids: List[str],
+    points: dict,
+    tiebreakers: List[str],
+    fair_play_points: Dict[str, int],
+    as_of_round: Optional[int] = None,
+) -> List[dict]:
+    """Ranked table from completed fixtures, counting only rounds up to ``as_of_round`` when given."""
+    arrays = fixture_arrays(fixtures, team_ids, fair_play_points)
+    n = len(team_ids)
+    mask = np.ones(len(arrays["home"]), dtype=bool) if as_of_round is None else arrays["round"] <= as_of_round
+    penalties = np.ones(len(arrays["penalty_team"]), dtype=bool) if as_of_round is None else arrays["penalty_round"] <= as_of_round
+
+    columns = table_columns(arrays, n, points, mask)
+    columns["fair_play"] = np.bincount(
+        arrays["penalty_team"][penalties], weights=arrays["penalty_points"][penalties], minlength=n,
+    ).astype(np.int64)
+
+    ranked = _order(np.arange(n), ["pts", *tiebreakers], team_ids, columns, arrays, mask, points)
+    return [
+        {"position": position, "team_id": team_ids[i], **{name: int(values[i]) for name, values in columns.items()}}
+        for position, i in enumerate(ranked, start=1)
+    ]
+
+
+async def load_standings(db, archive, competition_id: str, as_of_round: Optional[int] = None) -> Optional[dict]:
+    """Point-in-time standings of a competition, including fixtures already moved to the archive."""
+    competition = await db["competitions"].find_one(
+        id_filter(competition_id), {"point_accumulation": 1, "tiebreakers": 1, "fair_play_points": 1, ARCHIVED_FLAG: 1},
+    )
+    if not competition:
+        return None
+
+    projection = {"round": 1, "teams": 1, "scoring_events": 1}
+    cursor = db["fixtures"].find({"competition_id": competition_id, "is_complete": True}, projection)
+    fixtures = [doc async for doc in cursor]
+    fixtures += await archived_fixtures(db, archive, competition)
+
+    team_ids = [str(doc["_id"]) async for doc in db["teams"].find({"competition_id": competition_id}, {"_id": 1})]
+    known = set(team_ids)
+    for fixture in fixtures:
+        for team in fixture.get("teams") or []:
+            if team["team_id"] not in known:
+                known.add(team["team_id"])
+                team_ids.append(team["team_id"])
+
+    tiebreakers = competition.get("tiebreakers") or DEFAULT_TIEBREAKERS
+    rows = compute_standings(
+        fixtures, team_ids, competition.get("point_accumulation") or DEFAULT_POINTS,
+        tiebreakers, competition.get("fair_play_points") or {}, as_of_round,
+    )
+    return {"competition_id": competition_id, "round": as_of_round, "tiebreakers": tiebreakers, "rows": rows}
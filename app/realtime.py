@@ -0,0 +1,150 @@
+import asyncio
+import json
+import logging
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional, Set, Tuple
+from fastapi.encoders import jsonable_encoder
+
+logger = logging.getLogger(__name__)
+
+SUBSCRIBER_QUEUE_SIZE = 100
+
+
+def competition_channel(competition_id: str) -> str:
+    return f"competition:{competition_id}"
+
+
+def fixture_channel(fixture_id: str) -> str:
+    return f"fixture:{fixture_id}"
+
+
+class LocalBackend:
+    """Single-process backend: published messages loop straight back to this worker."""
+
+    def __init__(self):
+        self._queue: asyncio.Queue = asyncio.Queue()
+
+    async def publish(self, channel: str, message: str):
+        self._queue.put_nowait((channel, message))
+
+    async def listen(self) -> AsyncIterator[Tuple[str, str]]:
+        while True:
+            yield await self._queue.get()
+
+
+class RedisBackend:
+    """Fans messages out across workers through any Redis-compatible asyncio client."""
+
+    def __init__(self, client, prefix: str = "fm:live:"):
+        self.client = client
+        self.prefix = prefix
+
+    async def publish(self, channel: str, message: str):
+        await self.client.publish(self.prefix + channel, message)
+
+    async def listen(self) -> AsyncIterator[Tuple[str, str]]:
+        pubsub = self.client.pubsub()
+        await pubsub.psubscribe(self.prefix + "*")
+        async for item in pubsub.listen():
+            if item["type"] != "pmessage":
+                continue
+            channel, data = item["channel"], item["data"]
+            channel = channel.decode() if isinstance(channel, bytes) else channel
+            data = data.decode() if isinstance(data, bytes) else data
+            yield channel[len(self.prefix):], data
+
+
+class Broker:
+    """Per-channel pub/sub for live updates.
+
+    Every publish goes through the backend and is delivered to local subscribers by
+    a single pump task, so a shared backend fans each event out to all workers.
+    Slow subscribers lose their oldest queued messages rather than blocking others.
+    """
+
+    def __init__(self, backend, queue_size: int = SUBSCRIBER_QUEUE_SIZE):
+        self.backend = backend
+        self.queue_size = queue_size
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = defaultdict(set)
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        self._task = asyncio.create_task(self._pump())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _pump(self):
+        while True:
+            try:
+                async for channel, message in self.backend.listen():
+                    self._deliver(channel, message)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Live update backend failed; reconnecting")
+                await asyncio.sleep(1)
+
+    def _deliver(self, channel: str, message: str):
+        for queue in list(self._subscribers.get(channel, ())):
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(message)
+
+    async def publish(self, event: dict, *channels: str):
+        message = json.dumps(jsonable_encoder(event))
+        for channel in channels:
+            await self.backend.publish(channel, message)
+
+    @asynccontextmanager
+    async def subscribe(self, *channels: str):
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        for channel in channels:
+            self._subscribers[channel].add(queue)
+        try:
+            yield queue
+        finally:
+            for channel in channels:
+                self._subscribers[channel].discard(queue)
+                if not self._subscribers[channel]:
+                    del self._subscribers[channel]
+
+
+async def publish_fixture_update(broker: Broker, fixture: dict):
+    fixture_id = str(fixture["_id"])
+    await broker.publish(
+        {
+            "type": "fixture",
+            "fixture_id": fixture_id,
+            "competition_id": fixture["competition_id"],
+            "is_complete": fixture.get("is_complete"),
+            "teams": fixture.get("teams", []),
+        },
+        fixture_channel(fixture_id),
+        competition_channel(fixture["competition_id"]),
+    )
+
+
+async def publish_standings(broker: Broker, deltas: Dict[str, Dict[str, Dict[str, int]]]):
+    for competition_id, teams in deltas.items():
+        await broker.publish(
+            {"type": "standings", "competition_id": competition_id, "deltas": teams},
+            competition_channel(competition_id),
+        )
+
+
+async def publish_scoring_event(broker: Broker, event: dict):
+    channels = []
+    if event.get("fixture_id"):
+        channels.append(fixture_channel(event["fixture_id"]))
+    if event.get("competition_id"):
+        channels.append(competition_channel(event["competition_id"]))
+    if channels:
+        await broker.publish({"type": "scoring_event", "event": event}, *channels)
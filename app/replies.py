@@ -0,0 +1,74 @@
+import hashlib
+from typing import List
+from bson import ObjectId
+from pymongo import DESCENDING
+from app.db import id_filter, insert_new
+
+# Newest replies kept on each post so feeds can show a preview without a second query
+LATEST_REPLIES = 3
+
+
+def preview_entry(reply: dict) -> dict:
+    entry = {k: v for k, v in reply.items() if k != "_id"}
+    entry["id"] = str(reply["_id"])
+    return entry
+
+
+async def latest_replies(db, post_id: str) -> List[dict]:
+    cursor = db["replies"].find({"post_id": post_id}).sort([("date", DESCENDING), ("_id", DESCENDING)]).limit(LATEST_REPLIES)
+    return [preview_entry(doc) async for doc in cursor]
+
+
+async def add_replies(db, post_id: str, replies: List[dict]):
+    """Store replies in the ``replies`` collection and fold them into the post's count and preview."""
+    if not replies:
+        return
+    for reply in replies:
+        reply["post_id"] = post_id
+    await db["replies"].insert_many(replies)
+    await db["posts"].update_one(id_filter(post_id), {
+        "$inc": {"reply_count": len(replies)},
+        "$push": {"latest_replies": {
+            "$each": [preview_entry(reply) for reply in replies],
+            "$sort": {"date": -1},
+            "$slice": LATEST_REPLIES,
+        }},
+    })
+
+
+async def refresh_post(db, post_id: str, count_change: int = 0):
+    """Rebuild a post's reply preview after a reply was edited or removed."""
+    update = {"$set": {"latest_replies": await latest_replies(db, post_id)}}
+    if count_change:
+        update["$inc"] = {"reply_count": count_change}
+    await db["posts"].update_one(id_filter(post_id), update)
+
+
+def embedded_reply_id(post_id: str, position: int) -> ObjectId:
+    # The same embedded reply always gets the same _id, so a rerun can't copy it twice
+    return ObjectId(hashlib.sha1(f"{post_id}:{position}".encode()).digest()[:12])
+
+
+async def migrate_embedded_replies(db, batch_size: int = 100) -> dict:
+    """Move replies embedded in ``Post.replies`` into the ``replies`` collection.
+
+    Safe to run again after a failure: replies a previous run already copied are skipped.
+    """
+    posts = replies = 0
+    cursor = db["posts"].find({"replies.0": {"$exists": True}}, {"replies": 1})
+    async for post in cursor:
+        post_id = str(post["_id"])
+        embedded = [
+            {**reply, "_id": embedded_reply_id(post_id, position), "post_id": post_id}
+            for position, reply in enumerate(post["replies"])
+        ]
+        for start in range(0, len(embedded), batch_size):
+            await insert_new(db["replies"], embedded[start:start + batch_size])
+        await db["posts"].update_one({"_id": post["_id"]}, {
+            "$set": {"replies": []},
+            "$inc": {"reply_count": len(embedded)},
+        })
+        await refresh_post(db, post_id)
+        posts += 1
+        replies += len(embedded)
+    return {"posts": posts, "replies": replies}
@@ -0,0 +1,57 @@
+from datetime import date, datetime, time
+from fastapi import APIRouter, Request
+from fastapi.responses import PlainTextResponse
+from app.indexes import ensure_indexes
+from app.replies import migrate_embedded_replies
+from app.counters import backfill_competition_counters
+from app.archive import backfill_archived_flags
+from app.cascade import ARCHIVE_SEASON, completed_seasons
+from app.metrics import TimedRoute
+
+router = APIRouter(route_class=TimedRoute)
+
+@router.get("/admin/indexes")
+async def get_index_diff(request: Request):
+    db = request.app.state.db
+    return await ensure_indexes(db, dry_run=True)
+
+@router.post("/admin/indexes")
+async def sync_indexes(request: Request, dry_run: bool = False):
+    db = request.app.state.db
+    return await ensure_indexes(db, dry_run=dry_run)
+
+@router.get("/admin/cache")
+async def get_cache_stats(request: Request):
+    return request.app.state.cache.stats()
+
+@router.post("/admin/migrations/profile_search")
+async def backfill_profile_search(request: Request):
+    db = request.app.state.db
+    return {"indexed": await request.app.state.search.backfill(db)}
+
+@router.post("/admin/migrations/replies")
+async def migrate_replies(request: Request):
+    db = request.app.state.db
+    return await migrate_embedded_replies(db)
+
+@router.post("/admin/migrations/competition_counters")
+async def migrate_competition_counters(request: Request):
+    db = request.app.state.db
+    return await backfill_competition_counters(db)
+
+@router.post("/admin/migrations/archived_flags")
+async def migrate_archived_flags(request: Request):
+    db = request.app.state.db
+    return await backfill_archived_flags(db, request.app.state.archive)
+
+@router.post("/admin/archive/seasons")
+async def archive_completed_seasons(request: Request, completed_before: date):
+    """Queue an archive job for every competition whose season finished before ``completed_before``."""
+    db = request.app.state.db
+    competition_ids = await completed_seasons(db, datetime.combine(completed_before, time.min))
+    jobs = [await request.app.state.jobs.enqueue(ARCHIVE_SEASON, {"competition_id": cid}) for cid in competition_ids]
+    return {"competitions": competition_ids, "job_ids": [str(job["_id"]) for job in jobs]}
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics(request: Request):
+    return request.app.state.metrics.render()
@@ -1,8 +1,27 @@
-from fastapi import APIRouter, HTTPException, Request
-from app.models import Competition
-from typing import List
+import asyncio
+from datetime import datetime
+from itertools import islice
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from app.models import (
+    BulkResult, Competition, CompetitionOverview, CompetitionUpdate, Fixture, Job, LeagueTable, MemberCompetition,
+    Post, ProfileSummary, ScheduleRequest, ScheduleResult, StandingsTable, Team,
+)
+from app.db import id_filter, update_document, version_etag, with_id
+from app.pagination import NEXT_CURSOR_HEADER, PageParams, encode_cursor, keyset_query, paginate, projection_for
+from app.standings import STANDINGS_SORT
+from app.ranking import load_standings
+from app.cache import cached
+from app.etag import conditional
+from app.bulk import bulk_insert
+from app.counters import recount
+from app.cascade import ARCHIVE_COMPETITION, DELETE_COMPETITION
+from app.scheduling import FORMATS, KNOCKOUT, TYPE_FORMATS, fixture_count, fixture_documents, last_slot_fits_day, plan_schedule
+from typing import List, Literal, Optional
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from app.metrics import TimedRoute
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
 # Default free media repositories
 DEFAULT_PHOTO_REPOSITORIES = [
@@ -27,15 +46,30 @@ DEFAULT_VIDEO_REPOSITORIES = [
     "https://videos.pexels.com/video-files/4754020/4754020-uhd_2560_1440_25fps.mp4"   # Gym workout
 ]
 
-@router.post("/competitions/", response_model=Competition)
-async def create_competition(competition: Competition, request: Request):
-    db = request.app.state.db
-    comp_dict = competition.dict(exclude_unset=True)
+# Maintained by the child create/delete handlers, never written by clients
+SERVER_FIELDS = {"id", "counts", "latest"}
+
+OVERVIEW_MAX_TEAMS = 500
+SCHEDULE_PREVIEW_LIMIT = 500
+# Fixtures built and inserted per insert_many when writing a schedule
+SCHEDULE_WRITE_BATCH = 1000
 
+def with_default_repositories(comp_dict: dict) -> dict:
     if not comp_dict.get("default_photo_repositories"):
         comp_dict["default_photo_repositories"] = DEFAULT_PHOTO_REPOSITORIES
     if not comp_dict.get("default_video_repositories"):
         comp_dict["default_video_repositories"] = DEFAULT_VIDEO_REPOSITORIES
+    return comp_dict
+
+def prepare_bulk_competition(comp_dict: dict) -> dict:
+    for field in SERVER_FIELDS:
+        comp_dict.pop(field, None)
+    return with_default_repositories(comp_dict)
+
+@router.post("/competitions/", response_model=Competition)
+async def create_competition(competition: Competition, request: Request):
+    db = request.app.state.db
+    comp_dict = with_default_repositories(competition.dict(exclude_unset=True, exclude=SERVER_FIELDS))
 
     result = await db["competitions"].insert_one(comp_dict)
     competition_id = str(result.inserted_id)
@@ -45,55 +79,304 @@ async def create_competition(competition: Competition, request: Request):
         await db["competition_members"].insert_one({
             "competition_id": competition_id,
             "user_id": comp_dict["owner_id"],
-            "role": "owner"
+            "role": "owner",
+            "joined_at": datetime.utcnow()
         })
 
     return Competition(**comp_dict)
 
-@router.get("/competitions/", response_model=List[Competition])
-async def list_competitions(request: Request, owner_id: str = None, member_id: str = None):
+@router.post("/competitions/bulk", response_model=BulkResult)
+async def create_competitions_bulk(request: Request):
+    db = request.app.state.db
+    result, inserted = await bulk_insert(request, db["competitions"], Competition, prepare=prepare_bulk_competition)
+
+    owners = [
+        {"competition_id": str(doc["_id"]), "user_id": doc["owner_id"], "role": "owner", "joined_at": datetime.utcnow()}
+        for doc in inserted if doc.get("owner_id")
+    ]
+    if owners:
+        await db["competition_members"].insert_many(owners, ordered=False)
+    return result
+
+async def member_competitions(db, member_id: str, page: PageParams, response: Response, sort: str, descending: bool):
+    """A member's competitions with their role, in one aggregation over their memberships.
+
+    The page is cut from competition_members in (sort, _id) order first, so only
+    that page of competitions is looked up.
+    """
+    direction = -1 if descending else 1
+    pipeline = [
+        {"$match": keyset_query({"user_id": member_id}, page.after, sort, descending)},
+        {"$sort": {sort: direction, "_id": direction}},
+        {"$limit": page.limit + 1},
+        # competition_id holds the hex of the competition's ObjectId; older documents use plain string ids
+        {"$addFields": {"competition_key": {"$convert": {"input": "$competition_id", "to": "objectId", "onError": "$competition_id"}}}},
+        {"$lookup": {"from": "competitions", "localField": "competition_key", "foreignField": "_id", "as": "competition"}},
+    ]
+    memberships = await db["competition_members"].aggregate(pipeline).to_list(length=page.limit + 1)
+
+    headers = {}
+    if len(memberships) > page.limit:
+        memberships = memberships[:page.limit]
+        headers[NEXT_CURSOR_HEADER] = encode_cursor(memberships[-1], sort)
+
+    docs = []
+    for membership in memberships:
+        if not membership["competition"]:
+            continue
+        doc = membership["competition"][0]
+        doc.update(id=str(doc["_id"]), role=membership.get("role"), joined_at=membership.get("joined_at"))
+        docs.append(doc)
+
+    if page.fields:
+        projection_for(MemberCompetition, page.fields, None)  # rejects unknown fields
+        items = [{f: doc.get(f) for f in ["id", *page.fields]} for doc in docs]
+        return JSONResponse(jsonable_encoder(items), headers=headers)
+    response.headers.update(headers)
+    return [MemberCompetition(**doc) for doc in docs]
+
+async def add_member_summaries(db, competitions: List[MemberCompetition], avatars: int):
+    """Fill in member counts, owner and the first ``avatars`` members for a page of competitions.
+
+    One aggregation covers the whole page: memberships are grouped per
+    competition in join order (from the competition_joined_at index) and the
+    owner and first members are joined with their profiles.
+    """
+    if not competitions:
+        return
+    pipeline = [
+        {"$match": {"competition_id": {"$in": [c.id for c in competitions]}}},
+        {"$sort": {"competition_id": 1, "joined_at": 1, "_id": 1}},
+        {"$group": {
+            "_id": "$competition_id",
+            "member_count": {"$sum": 1},
+            "owner_id": {"$max": {"$cond": [{"$eq": ["$role", "owner"]}, "$user_id", None]}},
+            "first_members": {"$firstN": {"input": "$user_id", "n": max(avatars, 1)}},
+        }},
+        {"$lookup": {"from": "profiles", "localField": "first_members", "foreignField": "user_id", "as": "member_profiles"}},
+        {"$lookup": {"from": "profiles", "localField": "owner_id", "foreignField": "user_id", "as": "owner_profiles"}},
+        {"$project": {
+            "member_count": 1, "first_members": 1,
+            **{f"{joined}.{field}": 1 for joined in ("member_profiles", "owner_profiles") for field in ("user_id", "full_name", "avatar_url")},
+        }},
+    ]
+    summaries = {doc["_id"]: doc async for doc in db["competition_members"].aggregate(pipeline)}
+
+    for competition in competitions:
+        summary = summaries.get(competition.id)
+        if not summary:
+            competition.member_count, competition.member_avatars = 0, []
+            continue
+        profiles = {p["user_id"]: p for p in summary["member_profiles"]}
+        competition.member_count = summary["member_count"]
+        competition.member_avatars = [
+            ProfileSummary(**profiles[user_id]) for user_id in summary["first_members"][:avatars] if user_id in profiles
+        ]
+        if summary["owner_profiles"]:
+            competition.owner = ProfileSummary(**summary["owner_profiles"][0])
+
+@router.get("/competitions/", response_model=List[MemberCompetition])
+async def list_competitions(
+    request: Request,
+    response: Response,
+    owner_id: str = None,
+    member_id: str = None,
+    sort: Literal["joined_at", "role"] = Query("joined_at", description="Order of a member's competitions"),
+    descending: bool = False,
+    include_members: bool = Query(False, description="Add member_count, owner and member_avatars to each competition"),
+    avatars: int = Query(5, ge=0, le=20, description="Member avatars per competition with include_members"),
+    page: PageParams = Depends(),
+):
     db = request.app.state.db
 
     if owner_id:
-        cursor = db["competitions"].find({"owner_id": owner_id})
+        competitions = await paginate(db["competitions"], {"owner_id": owner_id}, page, MemberCompetition, response)
     elif member_id:
-        member_competitions = []
-        async for member in db["competition_members"].find({"user_id": member_id}):
-            member_competitions.append(member["competition_id"])
-        cursor = db["competitions"].find({"id": {"$in": member_competitions}})
+        competitions = await member_competitions(db, member_id, page, response, sort, descending)
     else:
-        cursor = db["competitions"].find()
+        competitions = await paginate(db["competitions"], {}, page, MemberCompetition, response)
 
-    competitions = []
-    async for doc in cursor:
-        doc["id"] = str(doc["_id"])
-        competitions.append(Competition(**doc))
+    # A fields selection comes back as a raw response and is returned as is
+    if include_members and isinstance(competitions, list):
+        await add_member_summaries(db, competitions, avatars)
     return competitions
 
 @router.get("/competitions/{competition_id}", response_model=Competition)
-async def get_competition(competition_id: str, request: Request):
+async def get_competition(competition_id: str, request: Request, response: Response):
+    db = request.app.state.db
+
+    async def load():
+        doc = await db["competitions"].find_one(id_filter(competition_id))
+        if not doc:
+            raise HTTPException(status_code=404, detail="Competition not found")
+        doc["id"] = str(doc["_id"])
+        response.headers["ETag"] = version_etag(doc.get("version"))
+        return Competition(**doc)
+
+    return conditional(request, response, await cached(request, response, "competition", [f"competition:{competition_id}"], load))
+
+@router.get("/competitions/{competition_id}/overview", response_model=CompetitionOverview)
+async def get_competition_overview(
+    competition_id: str,
+    request: Request,
+    response: Response,
+    fixtures_limit: int = Query(5, ge=1, le=50),
+    posts_limit: int = Query(10, ge=1, le=50),
+):
     db = request.app.state.db
-    doc = await db["competitions"].find_one({"_id": competition_id})
-    if not doc:
+    scope = {"competition_id": competition_id}
+    now = datetime.utcnow()
+
+    competition, teams, upcoming, recent, standings, posts = await asyncio.gather(
+        db["competitions"].find_one(id_filter(competition_id)),
+        db["teams"].find(scope).limit(OVERVIEW_MAX_TEAMS).to_list(length=OVERVIEW_MAX_TEAMS),
+        db["fixtures"].find({**scope, "is_complete": False, "date_time": {"$gte": now}})
+            .sort("date_time", 1).limit(fixtures_limit).to_list(length=fixtures_limit),
+        db["fixtures"].find({**scope, "is_complete": True})
+            .sort("date_time", -1).limit(fixtures_limit).to_list(length=fixtures_limit),
+        db["league_table"].find(scope).sort(STANDINGS_SORT).limit(OVERVIEW_MAX_TEAMS).to_list(length=OVERVIEW_MAX_TEAMS),
+        db["posts"].find(scope).sort("date", -1).limit(posts_limit).to_list(length=posts_limit),
+    )
+    if not competition:
         raise HTTPException(status_code=404, detail="Competition not found")
-    doc["id"] = str(doc["_id"])
-    return Competition(**doc)
 
-@router.put("/competitions/{competition_id}", response_model=Competition)
-async def update_competition(competition_id: str, competition: Competition, request: Request):
+    return conditional(request, response, CompetitionOverview(
+        competition=Competition(**with_id(competition)),
+        teams=[Team(**with_id(doc)) for doc in teams],
+        upcoming_fixtures=[Fixture(**with_id(doc)) for doc in upcoming],
+        recent_fixtures=[Fixture(**with_id(doc)) for doc in recent],
+        standings=[LeagueTable(**with_id(doc)) for doc in standings],
+        latest_posts=[Post(**with_id(doc)) for doc in posts],
+    ))
+
+@router.get("/competitions/{competition_id}/standings", response_model=StandingsTable)
+async def get_competition_standings(
+    competition_id: str,
+    request: Request,
+    response: Response,
+    round: Optional[int] = Query(None, ge=1),
+):
     db = request.app.state.db
-    comp_dict = competition.dict(exclude_unset=True)
-    await db["competitions"].update_one({"_id": competition_id}, {"$set": comp_dict})
-    doc = await db["competitions"].find_one({"_id": competition_id})
-    if not doc:
+
+    async def load():
+        table = await load_standings(db, request.app.state.archive, competition_id, round)
+        if table is None:
+            raise HTTPException(status_code=404, detail="Competition not found")
+        return StandingsTable(**table)
+
+    # Fixture results bump the league_table namespace, tiebreaker settings the competition one
+    namespaces = [f"league_table:{competition_id}", f"competition:{competition_id}"]
+    return conditional(request, response, await cached(request, response, "standings", namespaces, load))
+
+@router.post("/competitions/{competition_id}/schedule", response_model=ScheduleResult)
+async def schedule_competition(
+    competition_id: str,
+    schedule: ScheduleRequest,
+    request: Request,
+    preview: bool = False,
+    replace: bool = False,
+):
+    db = request.app.state.db
+    competition = await db["competitions"].find_one(id_filter(competition_id), {"type": 1})
+    if not competition:
         raise HTTPException(status_code=404, detail="Competition not found")
+
+    schedule_format = schedule.format or TYPE_FORMATS.get(competition.get("type"))
+    if schedule_format not in FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(FORMATS)}")
+    if not schedule.venues:
+        raise HTTPException(status_code=400, detail="At least one venue is required")
+    if schedule.rest_days < 0 or schedule.matches_per_venue_per_day < 1 or schedule.slot_minutes < 1:
+        raise HTTPException(status_code=400, detail="Invalid rest_days, matches_per_venue_per_day or slot_minutes")
+    if not last_slot_fits_day(schedule.kickoff, schedule.matches_per_venue_per_day, schedule.slot_minutes):
+        raise HTTPException(status_code=400, detail="matches_per_venue_per_day slots of slot_minutes from kickoff run past midnight")
+
+    team_ids = schedule.team_ids
+    if team_ids is None:
+        cursor = db["teams"].find({"competition_id": competition_id}, {"_id": 1})
+        team_ids = [str(doc["_id"]) async for doc in cursor]
+    if len(team_ids) < 2:
+        raise HTTPException(status_code=400, detail="At least two teams are needed to build a schedule")
+
+    # Regenerating keeps completed fixtures, so their pairings are left out of the new schedule
+    played = []
+    if replace:
+        cursor = db["fixtures"].find({"competition_id": competition_id, "is_complete": True}, {"teams.team_id": 1})
+        played = [tuple(team["team_id"] for team in doc["teams"]) async for doc in cursor if len(doc.get("teams") or []) == 2]
+        if played and schedule_format == KNOCKOUT:
+            raise HTTPException(status_code=409, detail="A knockout bracket can't be regenerated once matches have been played")
+
+    # Large seasons take a noticeable fraction of a second to pair up; keep the event loop free
+    plan = await asyncio.to_thread(
+        plan_schedule, schedule_format, team_ids, schedule.venues, schedule.start_date, schedule.kickoff,
+        schedule.rest_days, schedule.matches_per_venue_per_day, schedule.slot_minutes, schedule.seed, played,
+    )
+
+    last_kickoff = plan.last_kickoff()
+    fits_window = schedule.end_date is None or last_kickoff is None or last_kickoff.date() <= schedule.end_date
+    result = ScheduleResult(
+        format=schedule_format,
+        teams=len(team_ids),
+        rounds=len(plan.rounds),
+        fixture_count=fixture_count(plan.rounds, team_ids),
+        first_kickoff=plan.first_kickoff(),
+        last_kickoff=last_kickoff,
+        fits_window=fits_window,
+        written=False,
+        bracket=[[list(pair) for pair in pairs] for pairs in plan.rounds] if schedule_format == KNOCKOUT else None,
+    )
+
+    # Documents are only built for what is returned or written, never for the whole season at once
+    docs = fixture_documents(competition_id, plan, team_ids)
+    if preview:
+        result.fixtures = [Fixture(id=None, **doc) for doc in islice(docs, SCHEDULE_PREVIEW_LIMIT)]
+        return result
+    if not fits_window:
+        raise HTTPException(status_code=400, detail=f"Schedule ends {last_kickoff.date()}, after end_date")
+
+    if replace:
+        await db["fixtures"].delete_many({"competition_id": competition_id, "is_complete": False})
+    elif await db["fixtures"].count_documents({"competition_id": competition_id}, limit=1):
+        raise HTTPException(status_code=409, detail="Competition already has fixtures; pass replace=true to regenerate")
+
+    while True:
+        batch = list(islice(docs, SCHEDULE_WRITE_BATCH))
+        if not batch:
+            break
+        await db["fixtures"].insert_many(batch, ordered=False)
+    await recount(db, competition_id, ["fixtures"])
+    await request.app.state.cache.invalidate(f"competition:{competition_id}")
+    result.written = True
+    return result
+
+@router.put("/competitions/{competition_id}", response_model=Competition)
+async def update_competition(competition_id: str, competition: Competition, request: Request, response: Response):
+    db = request.app.state.db
+    comp_dict = competition.dict(exclude_unset=True, exclude=SERVER_FIELDS)
+    doc = await update_document(db["competitions"], competition_id, comp_dict, request, response, "Competition not found")
+    await request.app.state.cache.invalidate(f"competition:{competition_id}")
     doc["id"] = str(doc["_id"])
     return Competition(**doc)
 
+@router.patch("/competitions/{competition_id}", response_model=Competition)
+async def patch_competition(competition_id: str, competition: CompetitionUpdate, request: Request, response: Response):
+    return await update_competition(competition_id, competition, request, response)
+
 @router.delete("/competitions/{competition_id}")
 async def delete_competition(competition_id: str, request: Request):
     db = request.app.state.db
-    result = await db["competitions"].delete_one({"_id": competition_id})
+    result = await db["competitions"].delete_one(id_filter(competition_id))
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Competition not found")
-    return {"message": "Competition deleted"}
+    await request.app.state.cache.invalidate(f"competition:{competition_id}")
+    # Teams, fixtures, posts etc. are removed in the background; follow along at /jobs/{job_id}
+    job = await request.app.state.jobs.enqueue(DELETE_COMPETITION, {"competition_id": competition_id})
+    return {"message": "Competition deleted", "job_id": str(job["_id"])}
+
+@router.post("/competitions/{competition_id}/archive", response_model=Job, status_code=202)
+async def archive_competition(competition_id: str, request: Request):
+    db = request.app.state.db
+    if not await db["competitions"].find_one(id_filter(competition_id), {"_id": 1}):
+        raise HTTPException(status_code=404, detail="Competition not found")
+    job = await request.app.state.jobs.enqueue(ARCHIVE_COMPETITION, {"competition_id": competition_id})
+    return Job(**with_id(job))
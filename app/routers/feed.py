@@ -0,0 +1,22 @@
+from fastapi import APIRouter, Query, Request, Response
+from app.models import FeedItem
+from app.feed import DEFAULT_FEED_LIMIT, MAX_FEED_LIMIT, build_feed
+from app.pagination import NEXT_CURSOR_HEADER
+from app.metrics import TimedRoute
+from typing import List, Optional
+
+router = APIRouter(route_class=TimedRoute)
+
+@router.get("/feed", response_model=List[FeedItem])
+async def get_feed(
+    user_id: str,
+    request: Request,
+    response: Response,
+    limit: int = Query(DEFAULT_FEED_LIMIT, ge=1, le=MAX_FEED_LIMIT),
+    after: Optional[str] = Query(None, description="Cursor returned in the X-Next-Cursor header"),
+):
+    db = request.app.state.read_db
+    items, next_cursor = await build_feed(db, user_id, limit, after)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return items
@@ -1,8 +1,11 @@
-from fastapi import APIRouter, HTTPException, Request
-from app.models import FixtureTeam
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from app.models import FixtureTeam, FixtureTeamUpdate
+from app.db import id_filter, update_document
+from app.pagination import PageParams, paginate
+from app.metrics import TimedRoute
 from typing import List
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
 @router.post("/fixture_teams/", response_model=FixtureTeam)
 async def create_fixture_team(fixture_team: FixtureTeam, request: Request):
@@ -13,39 +16,35 @@ async def create_fixture_team(fixture_team: FixtureTeam, request: Request):
     return FixtureTeam(**ft_dict)
 
 @router.get("/fixture_teams/", response_model=List[FixtureTeam])
-async def list_fixture_teams(request: Request):
+async def list_fixture_teams(request: Request, response: Response, page: PageParams = Depends()):
     db = request.app.state.db
-    cursor = db["fixture_teams"].find()
-    fixture_teams = []
-    async for doc in cursor:
-        doc["id"] = str(doc["_id"])
-        fixture_teams.append(FixtureTeam(**doc))
-    return fixture_teams
+    return await paginate(db["fixture_teams"], {}, page, FixtureTeam, response)
 
 @router.get("/fixture_teams/{ft_id}", response_model=FixtureTeam)
 async def get_fixture_team(ft_id: str, request: Request):
     db = request.app.state.db
-    doc = await db["fixture_teams"].find_one({"_id": ft_id})
+    doc = await db["fixture_teams"].find_one(id_filter(ft_id))
     if not doc:
         raise HTTPException(status_code=404, detail="Fixture team not found")
     doc["id"] = str(doc["_id"])
     return FixtureTeam(**doc)
 
 @router.put("/fixture_teams/{ft_id}", response_model=FixtureTeam)
-async def update_fixture_team(ft_id: str, fixture_team: FixtureTeam, request: Request):
+async def update_fixture_team(ft_id: str, fixture_team: FixtureTeam, request: Request, response: Response):
     db = request.app.state.db
-    ft_dict = fixture_team.dict(exclude_unset=True)
-    await db["fixture_teams"].update_one({"_id": ft_id}, {"$set": ft_dict})
-    doc = await db["fixture_teams"].find_one({"_id": ft_id})
-    if not doc:
-        raise HTTPException(status_code=404, detail="Fixture team not found")
+    ft_dict = fixture_team.dict(exclude_unset=True, exclude={"id"})
+    doc = await update_document(db["fixture_teams"], ft_id, ft_dict, request, response, "Fixture team not found")
     doc["id"] = str(doc["_id"])
     return FixtureTeam(**doc)
 
+@router.patch("/fixture_teams/{ft_id}", response_model=FixtureTeam)
+async def patch_fixture_team(ft_id: str, fixture_team: FixtureTeamUpdate, request: Request, response: Response):
+    return await update_fixture_team(ft_id, fixture_team, request, response)
+
 @router.delete("/fixture_teams/{ft_id}")
 async def delete_fixture_team(ft_id: str, request: Request):
     db = request.app.state.db
-    result = await db["fixture_teams"].delete_one({"_id": ft_id})
+    result = await db["fixture_teams"].delete_one(id_filter(ft_id))
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Fixture team not found")
     return {"message": "Fixture team deleted"}
@@ -1,51 +1,132 @@
-from fastapi import APIRouter, HTTPException, Request
-from app.models import Fixture
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from pymongo import ReturnDocument
+from app.models import BulkResult, Fixture, FixtureEvent, FixtureUpdate, ScoringEvent
+from app.db import id_filter, update_document, version_etag
+from app.standings import apply_fixture_change, apply_fixtures_bulk, cache_namespaces
+from app.realtime import publish_fixture_update, publish_scoring_event, publish_standings
+from app.bulk import bulk_insert
+from app.counters import child_moved, child_removed, children_added, competitions_changed
+from app.pagination import PageParams, paginate
+from app.streaming import ExportParams, stream_documents
+from app.etag import conditional
+from app.metrics import TimedRoute
+from typing import List, Optional
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
+
+async def standings_changed(request: Request, deltas: dict, *fixtures: Optional[dict]):
+    # Fair play and point-in-time tables move with a completed fixture's events and
+    # round even when no points change, so any completed pre- or post-image counts
+    changed = set(deltas) | {f["competition_id"] for f in fixtures if f and f.get("is_complete")}
+    for competition_id in changed:
+        await request.app.state.cache.invalidate(*cache_namespaces(competition_id))
+    await publish_standings(request.app.state.broker, deltas)
 
 @router.post("/fixtures/", response_model=Fixture)
 async def create_fixture(fixture: Fixture, request: Request):
     db = request.app.state.db
     fixture_dict = fixture.dict(exclude_unset=True)
     result = await db["fixtures"].insert_one(fixture_dict)
+    await competitions_changed(request, await children_added(db, "fixtures", [fixture_dict]))
+    await standings_changed(request, await apply_fixture_change(db, None, fixture_dict), fixture_dict)
     fixture_dict["id"] = str(result.inserted_id)
     return Fixture(**fixture_dict)
 
+@router.post("/fixtures/bulk", response_model=BulkResult)
+async def create_fixtures_bulk(request: Request):
+    db = request.app.state.db
+    result, inserted = await bulk_insert(request, db["fixtures"], Fixture)
+    await competitions_changed(request, await children_added(db, "fixtures", inserted))
+    for competition_id in await apply_fixtures_bulk(db, inserted):
+        await request.app.state.cache.invalidate(*cache_namespaces(competition_id))
+    return result
+
 @router.get("/fixtures/", response_model=List[Fixture])
-async def list_fixtures(request: Request):
+async def list_fixtures(request: Request, response: Response, competition_id: Optional[str] = None, page: PageParams = Depends()):
     db = request.app.state.db
-    cursor = db["fixtures"].find()
-    fixtures = []
-    async for doc in cursor:
-        doc["id"] = str(doc["_id"])
-        fixtures.append(Fixture(**doc))
-    return fixtures
+    query = {"competition_id": competition_id} if competition_id else {}
+    return conditional(request, response, await paginate(db["fixtures"], query, page, Fixture, response, sort_field="date_time"))
+
+@router.get("/fixtures/export")
+async def export_fixtures(request: Request, competition_id: Optional[str] = None, params: ExportParams = Depends()):
+    db = request.app.state.read_db
+    query = {"competition_id": competition_id} if competition_id else {}
+    return stream_documents(db["fixtures"], query, Fixture, params, sort_field="date_time", filename="fixtures")
 
 @router.get("/fixtures/{fixture_id}", response_model=Fixture)
-async def get_fixture(fixture_id: str, request: Request):
+async def get_fixture(fixture_id: str, request: Request, response: Response):
     db = request.app.state.db
-    doc = await db["fixtures"].find_one({"_id": fixture_id})
+    # Fixtures of archived seasons are no longer in the collection but can still be read
+    doc = await db["fixtures"].find_one(id_filter(fixture_id)) or await request.app.state.archive.find(db, "fixtures", fixture_id)
     if not doc:
         raise HTTPException(status_code=404, detail="Fixture not found")
     doc["id"] = str(doc["_id"])
-    return Fixture(**doc)
+    response.headers["ETag"] = version_etag(doc.get("version"))
+    return conditional(request, response, Fixture(**doc))
 
 @router.put("/fixtures/{fixture_id}", response_model=Fixture)
-async def update_fixture(fixture_id: str, fixture: Fixture, request: Request):
+async def update_fixture(fixture_id: str, fixture: Fixture, request: Request, response: Response):
     db = request.app.state.db
-    fixture_dict = fixture.dict(exclude_unset=True)
-    await db["fixtures"].update_one({"_id": fixture_id}, {"$set": fixture_dict})
-    doc = await db["fixtures"].find_one({"_id": fixture_id})
-    if not doc:
+    fixture_dict = fixture.dict(exclude_unset=True, exclude={"id"})
+    # The pre-image is read atomically with the write so concurrent score updates
+    # each move the league table from exactly the state they replaced
+    before = await update_document(
+        db["fixtures"], fixture_id, fixture_dict, request, response, "Fixture not found",
+        return_document=ReturnDocument.BEFORE,
+    )
+    doc = {**before, **fixture_dict, "version": before.get("version", 0) + 1}
+    await competitions_changed(request, await child_moved(db, "fixtures", before, "fixtures", doc))
+    await publish_fixture_update(request.app.state.broker, doc)
+    await standings_changed(request, await apply_fixture_change(db, before, doc), before, doc)
+    doc["id"] = str(doc["_id"])
+    return Fixture(**doc)
+
+@router.patch("/fixtures/{fixture_id}", response_model=Fixture)
+async def patch_fixture(fixture_id: str, fixture: FixtureUpdate, request: Request, response: Response):
+    return await update_fixture(fixture_id, fixture, request, response)
+
+@router.post("/fixtures/{fixture_id}/events", response_model=Fixture)
+async def add_fixture_event(fixture_id: str, event: FixtureEvent, request: Request, response: Response):
+    db = request.app.state.db
+    fixture = await db["fixtures"].find_one(id_filter(fixture_id), {"competition_id": 1, "teams.team_id": 1})
+    if not fixture:
         raise HTTPException(status_code=404, detail="Fixture not found")
+    if event.team_id not in {team["team_id"] for team in fixture.get("teams", [])}:
+        raise HTTPException(status_code=400, detail="Team is not playing in this fixture")
+    competition = await db["competitions"].find_one(id_filter(fixture["competition_id"]), {"scoring_categories": 1})
+    categories = {c["name"]: c["points"] for c in (competition or {}).get("scoring_categories", [])}
+    if event.category not in categories:
+        raise HTTPException(status_code=400, detail="Unknown scoring category")
+
+    scoring_event = ScoringEvent(**event.dict(), points=categories[event.category])
+    # One atomic write appends the event and moves the score, so concurrent events never overwrite each other
+    doc = await update_document(
+        db["fixtures"], fixture_id, {}, request, response, "Fixture not found",
+        match={"teams.team_id": event.team_id},
+        operators={
+            "$push": {"scoring_events": scoring_event.dict(exclude={"fixture_id", "competition_id"})},
+            "$inc": {"teams.$.score": scoring_event.points},
+        },
+    )
+    if doc.get("is_complete"):
+        before = {**doc, "teams": [
+            {**team, "score": team["score"] - scoring_event.points} if team["team_id"] == event.team_id else team
+            for team in doc["teams"]
+        ]}
+        await standings_changed(request, await apply_fixture_change(db, before, doc), before, doc)
+
+    broker = request.app.state.broker
+    await publish_scoring_event(broker, {**scoring_event.dict(), "fixture_id": str(doc["_id"]), "competition_id": doc["competition_id"]})
+    await publish_fixture_update(broker, doc)
     doc["id"] = str(doc["_id"])
     return Fixture(**doc)
 
 @router.delete("/fixtures/{fixture_id}")
 async def delete_fixture(fixture_id: str, request: Request):
     db = request.app.state.db
-    result = await db["fixtures"].delete_one({"_id": fixture_id})
-    if result.deleted_count == 0:
+    doc = await db["fixtures"].find_one_and_delete(id_filter(fixture_id))
+    if not doc:
         raise HTTPException(status_code=404, detail="Fixture not found")
+    await competitions_changed(request, await child_removed(db, "fixtures", doc))
+    await standings_changed(request, await apply_fixture_change(db, doc, None), doc)
     return {"message": "Fixture deleted"}
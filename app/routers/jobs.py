@@ -0,0 +1,29 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from app.models import Job
+from app.db import id_filter, with_id
+from app.pagination import PageParams, paginate
+from app.metrics import TimedRoute
+from typing import List, Optional
+
+router = APIRouter(route_class=TimedRoute)
+
+@router.get("/jobs/", response_model=List[Job])
+async def list_jobs(request: Request, response: Response, status: Optional[str] = None, page: PageParams = Depends()):
+    db = request.app.state.db
+    query = {"status": status} if status else {}
+    return await paginate(db["jobs"], query, page, Job, response, sort_field="created_at", descending=True)
+
+@router.get("/jobs/{job_id}", response_model=Job)
+async def get_job(job_id: str, request: Request):
+    db = request.app.state.db
+    doc = await db["jobs"].find_one(id_filter(job_id))
+    if not doc:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return Job(**with_id(doc))
+
+@router.post("/jobs/{job_id}/retry", response_model=Job)
+async def retry_job(job_id: str, request: Request):
+    doc = await request.app.state.jobs.retry(id_filter(job_id)["_id"])
+    if not doc:
+        raise HTTPException(status_code=409, detail="Only failed jobs can be retried")
+    return Job(**with_id(doc))
@@ -1,51 +1,69 @@
-from fastapi import APIRouter, HTTPException, Request
-from app.models import LeagueTable
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from app.models import LeagueTable, LeagueTableUpdate
+from app.db import id_filter, update_document, version_etag
+from app.standings import cache_namespaces, rebuild_competition
+from app.cache import cached
+from app.etag import conditional
+from app.pagination import PageParams, paginate
+from app.metrics import TimedRoute
+from typing import List, Optional
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
 @router.post("/league_table/", response_model=LeagueTable)
 async def create_league_table(entry: LeagueTable, request: Request):
     db = request.app.state.db
     entry_dict = entry.dict(exclude_unset=True)
     result = await db["league_table"].insert_one(entry_dict)
+    await request.app.state.cache.invalidate(*cache_namespaces(entry_dict["competition_id"]))
     entry_dict["id"] = str(result.inserted_id)
     return LeagueTable(**entry_dict)
 
 @router.get("/league_table/", response_model=List[LeagueTable])
-async def list_league_table(request: Request):
+async def list_league_table(request: Request, response: Response, competition_id: Optional[str] = None, page: PageParams = Depends()):
     db = request.app.state.db
-    cursor = db["league_table"].find()
-    entries = []
-    async for doc in cursor:
-        doc["id"] = str(doc["_id"])
-        entries.append(LeagueTable(**doc))
-    return entries
+    query = {"competition_id": competition_id} if competition_id else {}
+    namespaces = [f"league_table:{competition_id}"] if competition_id else ["league_table"]
+    return conditional(request, response, await cached(
+        request, response, "league_table", namespaces,
+        lambda: paginate(db["league_table"], query, page, LeagueTable, response),
+    ))
 
 @router.get("/league_table/{entry_id}", response_model=LeagueTable)
-async def get_league_table(entry_id: str, request: Request):
+async def get_league_table(entry_id: str, request: Request, response: Response):
     db = request.app.state.db
-    doc = await db["league_table"].find_one({"_id": entry_id})
+    doc = await db["league_table"].find_one(id_filter(entry_id))
     if not doc:
         raise HTTPException(status_code=404, detail="League table entry not found")
     doc["id"] = str(doc["_id"])
-    return LeagueTable(**doc)
+    response.headers["ETag"] = version_etag(doc.get("version"))
+    return conditional(request, response, LeagueTable(**doc))
 
 @router.put("/league_table/{entry_id}", response_model=LeagueTable)
-async def update_league_table(entry_id: str, entry: LeagueTable, request: Request):
+async def update_league_table(entry_id: str, entry: LeagueTable, request: Request, response: Response):
     db = request.app.state.db
-    entry_dict = entry.dict(exclude_unset=True)
-    await db["league_table"].update_one({"_id": entry_id}, {"$set": entry_dict})
-    doc = await db["league_table"].find_one({"_id": entry_id})
-    if not doc:
-        raise HTTPException(status_code=404, detail="League table entry not found")
+    entry_dict = entry.dict(exclude_unset=True, exclude={"id"})
+    doc = await update_document(db["league_table"], entry_id, entry_dict, request, response, "League table entry not found")
+    await request.app.state.cache.invalidate(*cache_namespaces(doc["competition_id"]))
     doc["id"] = str(doc["_id"])
     return LeagueTable(**doc)
 
+@router.patch("/league_table/{entry_id}", response_model=LeagueTable)
+async def patch_league_table(entry_id: str, entry: LeagueTableUpdate, request: Request, response: Response):
+    return await update_league_table(entry_id, entry, request, response)
+
 @router.delete("/league_table/{entry_id}")
 async def delete_league_table(entry_id: str, request: Request):
     db = request.app.state.db
-    result = await db["league_table"].delete_one({"_id": entry_id})
-    if result.deleted_count == 0:
+    doc = await db["league_table"].find_one_and_delete(id_filter(entry_id))
+    if not doc:
         raise HTTPException(status_code=404, detail="League table entry not found")
+    await request.app.state.cache.invalidate(*cache_namespaces(doc["competition_id"]))
     return {"message": "League table entry deleted"}
+
+@router.post("/league_table/rebuild/{competition_id}")
+async def rebuild_league_table(competition_id: str, request: Request):
+    db = request.app.state.db
+    teams = await rebuild_competition(db, competition_id, request.app.state.archive)
+    await request.app.state.cache.invalidate(*cache_namespaces(competition_id))
+    return {"message": "League table rebuilt", "teams": teams}
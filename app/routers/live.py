@@ -0,0 +1,57 @@
+import asyncio
+from fastapi import APIRouter, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from app.realtime import competition_channel, fixture_channel
+from app.metrics import TimedRoute
+
+router = APIRouter(route_class=TimedRoute)
+
+KEEPALIVE_SECONDS = 15
+
+async def sse_events(request: Request, channel: str):
+    async with request.app.state.broker.subscribe(channel) as queue:
+        yield ": connected\n\n"
+        while not await request.is_disconnected():
+            try:
+                message = await asyncio.wait_for(queue.get(), KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            yield f"data: {message}\n\n"
+
+async def websocket_events(websocket: WebSocket, channel: str):
+    await websocket.accept()
+    async with websocket.app.state.broker.subscribe(channel) as queue:
+        # Clients only listen; reading is how we notice they went away
+        receiver = asyncio.create_task(websocket.receive_text())
+        try:
+            while True:
+                getter = asyncio.create_task(queue.get())
+                done, _ = await asyncio.wait({getter, receiver}, return_when=asyncio.FIRST_COMPLETED)
+                if receiver in done:
+                    getter.cancel()
+                    if receiver.exception():
+                        break
+                    receiver = asyncio.create_task(websocket.receive_text())
+                    continue
+                await websocket.send_text(getter.result())
+        except WebSocketDisconnect:
+            pass
+        finally:
+            receiver.cancel()
+
+@router.get("/live/competitions/{competition_id}")
+async def stream_competition(competition_id: str, request: Request):
+    return StreamingResponse(sse_events(request, competition_channel(competition_id)), media_type="text/event-stream")
+
+@router.get("/live/fixtures/{fixture_id}")
+async def stream_fixture(fixture_id: str, request: Request):
+    return StreamingResponse(sse_events(request, fixture_channel(fixture_id)), media_type="text/event-stream")
+
+@router.websocket("/live/competitions/{competition_id}/ws")
+async def competition_socket(websocket: WebSocket, competition_id: str):
+    await websocket_events(websocket, competition_channel(competition_id))
+
+@router.websocket("/live/fixtures/{fixture_id}/ws")
+async def fixture_socket(websocket: WebSocket, fixture_id: str):
+    await websocket_events(websocket, fixture_channel(fixture_id))
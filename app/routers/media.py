@@ -1,51 +1,71 @@
-from fastapi import APIRouter, HTTPException, Request
-from app.models import Media
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from pymongo import ReturnDocument
+from app.models import Media, MediaUpdate
+from app.db import id_filter, update_document
+from app.counters import MEDIA_RELATIONS, child_moved, child_removed, children_added, competitions_changed
+from app.pagination import PageParams, paginate
+from app.streaming import ExportParams, stream_documents
+from app.metrics import TimedRoute
+from typing import List, Optional
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
 @router.post("/media/", response_model=Media)
 async def create_media(media: Media, request: Request):
     db = request.app.state.db
     media_dict = media.dict(exclude_unset=True)
     result = await db["media"].insert_one(media_dict)
+    if media.type in MEDIA_RELATIONS:
+        await competitions_changed(request, await children_added(db, MEDIA_RELATIONS[media.type], [media_dict]))
     media_dict["id"] = str(result.inserted_id)
     return Media(**media_dict)
 
 @router.get("/media/", response_model=List[Media])
-async def list_media(request: Request):
+async def list_media(request: Request, response: Response, competition_id: Optional[str] = None, page: PageParams = Depends()):
     db = request.app.state.db
-    cursor = db["media"].find()
-    media_items = []
-    async for doc in cursor:
-        doc["id"] = str(doc["_id"])
-        media_items.append(Media(**doc))
-    return media_items
+    query = {"competition_id": competition_id} if competition_id else {}
+    return await paginate(db["media"], query, page, Media, response, sort_field="date", descending=True)
+
+@router.get("/media/export")
+async def export_media(request: Request, competition_id: Optional[str] = None, params: ExportParams = Depends()):
+    db = request.app.state.read_db
+    query = {"competition_id": competition_id} if competition_id else {}
+    return stream_documents(db["media"], query, Media, params, sort_field="date", filename="media")
 
 @router.get("/media/{media_id}", response_model=Media)
 async def get_media(media_id: str, request: Request):
     db = request.app.state.db
-    doc = await db["media"].find_one({"_id": media_id})
+    doc = await db["media"].find_one(id_filter(media_id))
     if not doc:
         raise HTTPException(status_code=404, detail="Media not found")
     doc["id"] = str(doc["_id"])
     return Media(**doc)
 
 @router.put("/media/{media_id}", response_model=Media)
-async def update_media(media_id: str, media: Media, request: Request):
+async def update_media(media_id: str, media: Media, request: Request, response: Response):
     db = request.app.state.db
-    media_dict = media.dict(exclude_unset=True)
-    await db["media"].update_one({"_id": media_id}, {"$set": media_dict})
-    doc = await db["media"].find_one({"_id": media_id})
-    if not doc:
-        raise HTTPException(status_code=404, detail="Media not found")
+    media_dict = media.dict(exclude_unset=True, exclude={"id"})
+    before = await update_document(
+        db["media"], media_id, media_dict, request, response, "Media not found",
+        return_document=ReturnDocument.BEFORE,
+    )
+    doc = {**before, **media_dict, "version": before.get("version", 0) + 1}
+    await competitions_changed(request, await child_moved(
+        db, MEDIA_RELATIONS.get(before.get("type")), before, MEDIA_RELATIONS.get(doc.get("type")), doc,
+    ))
     doc["id"] = str(doc["_id"])
     return Media(**doc)
 
+@router.patch("/media/{media_id}", response_model=Media)
+async def patch_media(media_id: str, media: MediaUpdate, request: Request, response: Response):
+    return await update_media(media_id, media, request, response)
+
 @router.delete("/media/{media_id}")
 async def delete_media(media_id: str, request: Request):
     db = request.app.state.db
-    result = await db["media"].delete_one({"_id": media_id})
-    if result.deleted_count == 0:
+    doc = await db["media"].find_one_and_delete(id_filter(media_id))
+    if not doc:
         raise HTTPException(status_code=404, detail="Media not found")
+    if doc.get("type") in MEDIA_RELATIONS:
+        await competitions_changed(request, await child_removed(db, MEDIA_RELATIONS[doc["type"]], doc))
     return {"message": "Media deleted"}
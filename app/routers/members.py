@@ -1,14 +1,19 @@
-from fastapi import APIRouter, HTTPException, Request
-from app.models import CompetitionMember
-from typing import List
-from bson import ObjectId
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from app.models import CompetitionMember, MemberListing, MemberPage, MembershipCheck, MembershipStatus
+from app.db import id_filter
+from app.membership import MAX_MEMBERSHIP_CHECKS, MembershipLoader, get_memberships, membership_namespace
+from app.pagination import DEFAULT_LIMIT, MAX_LIMIT, NEXT_CURSOR_HEADER, PageParams, encode_cursor, keyset_query, paginate
+from app.metrics import TimedRoute
+from typing import Dict, List, Optional
+from pymongo.errors import DuplicateKeyError
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
 @router.post("/members/", response_model=CompetitionMember)
 async def add_member(member: CompetitionMember, request: Request):
     db = request.app.state.db
     member_dict = member.dict(exclude_unset=True)
+    member_dict.setdefault("joined_at", member.joined_at)
 
     existing = await db["competition_members"].find_one({
         "competition_id": member_dict["competition_id"],
@@ -17,66 +22,110 @@ async def add_member(member: CompetitionMember, request: Request):
     if existing:
         raise HTTPException(status_code=400, detail="User is already a member of this competition")
 
-    result = await db["competition_members"].insert_one(member_dict)
+    try:
+        result = await db["competition_members"].insert_one(member_dict)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="User is already a member of this competition")
+    await request.app.state.cache.invalidate(membership_namespace(member_dict["user_id"]))
     member_dict["id"] = str(result.inserted_id)
     return CompetitionMember(**member_dict)
 
-@router.get("/members/competition/{competition_id}", response_model=List[dict])
-async def get_competition_members(competition_id: str, request: Request):
-    db = request.app.state.db
+# Fields returned per member; the rest of the member and profile documents stay in the database
+MEMBER_PROJECTION = {
+    "competition_id": 1, "user_id": 1, "role": 1, "joined_at": 1,
+    "user._id": 1, "user.user_id": 1, "user.email": 1, "user.full_name": 1, "user.avatar_url": 1,
+}
+
+async def member_page(db, competition_id: str, role: Optional[str], limit: int, after: Optional[str]):
+    """One page of members ordered by joined_at, plus member counts per role.
 
+    Both come from one aggregation: the competition's members are read in
+    (joined_at, _id) order from the index and a $facet splits them into the role
+    summary and the page, so only the page is joined with profiles.
+    """
+    page_filter = {"role": role} if role else {}
     pipeline = [
         {"$match": {"competition_id": competition_id}},
-        {
-            "$lookup": {
-                "from": "profiles",
-                "localField": "user_id",
-                "foreignField": "user_id",
-                "as": "user"
-            }
-        },
-        {"$unwind": "$user"}
+        {"$sort": {"joined_at": 1, "_id": 1}},
+        {"$facet": {
+            "roles": [{"$group": {"_id": "$role", "count": {"$sum": 1}}}],
+            "members": [
+                {"$match": keyset_query(page_filter, after, "joined_at", False)},
+                {"$limit": limit + 1},
+                {"$lookup": {"from": "profiles", "localField": "user_id", "foreignField": "user_id", "as": "user"}},
+                {"$unwind": {"path": "$user", "preserveNullAndEmptyArrays": True}},
+                {"$project": MEMBER_PROJECTION},
+            ],
+        }},
     ]
+    result = (await db["competition_members"].aggregate(pipeline).to_list(length=1))[0]
 
-    cursor = db["competition_members"].aggregate(pipeline)
+    docs = result["members"]
+    next_cursor = encode_cursor(docs[limit - 1], "joined_at") if len(docs) > limit else None
     members = []
-    async for doc in cursor:
+    for doc in docs[:limit]:
         doc["id"] = str(doc["_id"])
-        doc["user"]["id"] = str(doc["user"]["_id"])
-        members.append(doc)
-    return members
+        if doc.get("user"):
+            doc["user"]["id"] = str(doc["user"]["_id"])
+        members.append(MemberListing(**doc))
+    roles = {group["_id"]: group["count"] for group in result["roles"]}
+    return MemberPage(total=sum(roles.values()), roles=roles, members=members), next_cursor
+
+@router.get("/members/competition/{competition_id}", response_model=List[MemberListing])
+async def get_competition_members(
+    competition_id: str,
+    request: Request,
+    response: Response,
+    role: Optional[str] = None,
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    after: Optional[str] = Query(None, description="Cursor returned in the X-Next-Cursor header"),
+):
+    db = request.app.state.db
+    page, next_cursor = await member_page(db, competition_id, role, limit, after)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return page.members
+
+@router.get("/members/competition/{competition_id}/page", response_model=MemberPage)
+async def get_competition_member_page(
+    competition_id: str,
+    request: Request,
+    response: Response,
+    role: Optional[str] = None,
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    after: Optional[str] = Query(None, description="Cursor returned in the X-Next-Cursor header"),
+):
+    db = request.app.state.db
+    page, next_cursor = await member_page(db, competition_id, role, limit, after)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return page
 
 @router.get("/members/user/{user_id}", response_model=List[CompetitionMember])
-async def get_user_memberships(user_id: str, request: Request):
+async def get_user_memberships(user_id: str, request: Request, response: Response, page: PageParams = Depends()):
     db = request.app.state.db
-    cursor = db["competition_members"].find({"user_id": user_id})
-    members = []
-    async for doc in cursor:
-        doc["id"] = str(doc["_id"])
-        members.append(CompetitionMember(**doc))
-    return members
+    return await paginate(db["competition_members"], {"user_id": user_id}, page, CompetitionMember, response)
 
 @router.delete("/members/{member_id}")
 async def remove_member(member_id: str, request: Request):
     db = request.app.state.db
-    try:
-        oid = ObjectId(member_id)
-        result = await db["competition_members"].delete_one({"_id": oid})
-    except:
-        result = await db["competition_members"].delete_one({"_id": member_id})
-
-    if result.deleted_count == 0:
+    doc = await db["competition_members"].find_one_and_delete(id_filter(member_id))
+    if not doc:
         raise HTTPException(status_code=404, detail="Member not found")
+    await request.app.state.cache.invalidate(membership_namespace(doc["user_id"]))
     return {"message": "Member removed successfully"}
 
+@router.post("/members/check", response_model=Dict[str, MembershipStatus])
+async def check_memberships(check: MembershipCheck, memberships: MembershipLoader = Depends(get_memberships)):
+    if len(check.competition_ids) > MAX_MEMBERSHIP_CHECKS:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_MEMBERSHIP_CHECKS} competitions per request")
+    roles = await memberships.roles(check.user_id, check.competition_ids)
+    return {cid: MembershipStatus(is_member=role is not None, role=role) for cid, role in roles.items()}
+
 @router.get("/members/check/{competition_id}/{user_id}")
-async def check_membership(competition_id: str, user_id: str, request: Request):
-    db = request.app.state.db
-    member = await db["competition_members"].find_one({
-        "competition_id": competition_id,
-        "user_id": user_id
-    })
+async def check_membership(competition_id: str, user_id: str, memberships: MembershipLoader = Depends(get_memberships)):
+    role = await memberships.role(user_id, competition_id)
     return {
-        "is_member": member is not None,
-        "role": member.get("role") if member else None
+        "is_member": role is not None,
+        "role": role
     }
@@ -1,8 +1,11 @@
-from fastapi import APIRouter, HTTPException, Request
-from app.models import PointAccumulation
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from app.models import PointAccumulation, PointAccumulationUpdate
+from app.db import id_filter, update_document
+from app.pagination import PageParams, paginate
+from app.metrics import TimedRoute
 from typing import List
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
 @router.post("/point_accumulations/", response_model=PointAccumulation)
 async def create_point_accumulation(point_accumulation: PointAccumulation, request: Request):
@@ -13,39 +16,35 @@ async def create_point_accumulation(point_accumulation: PointAccumulation, reque
     return PointAccumulation(**pa_dict)
 
 @router.get("/point_accumulations/", response_model=List[PointAccumulation])
-async def list_point_accumulations(request: Request):
+async def list_point_accumulations(request: Request, response: Response, page: PageParams = Depends()):
     db = request.app.state.db
-    cursor = db["point_accumulations"].find()
-    point_accumulations = []
-    async for doc in cursor:
-        doc["id"] = str(doc["_id"])
-        point_accumulations.append(PointAccumulation(**doc))
-    return point_accumulations
+    return await paginate(db["point_accumulations"], {}, page, PointAccumulation, response)
 
 @router.get("/point_accumulations/{pa_id}", response_model=PointAccumulation)
 async def get_point_accumulation(pa_id: str, request: Request):
     db = request.app.state.db
-    doc = await db["point_accumulations"].find_one({"_id": pa_id})
+    doc = await db["point_accumulations"].find_one(id_filter(pa_id))
     if not doc:
         raise HTTPException(status_code=404, detail="Point accumulation not found")
     doc["id"] = str(doc["_id"])
     return PointAccumulation(**doc)
 
 @router.put("/point_accumulations/{pa_id}", response_model=PointAccumulation)
-async def update_point_accumulation(pa_id: str, point_accumulation: PointAccumulation, request: Request):
+async def update_point_accumulation(pa_id: str, point_accumulation: PointAccumulation, request: Request, response: Response):
     db = request.app.state.db
-    pa_dict = point_accumulation.dict(exclude_unset=True)
-    await db["point_accumulations"].update_one({"_id": pa_id}, {"$set": pa_dict})
-    doc = await db["point_accumulations"].find_one({"_id": pa_id})
-    if not doc:
-        raise HTTPException(status_code=404, detail="Point accumulation not found")
+    pa_dict = point_accumulation.dict(exclude_unset=True, exclude={"id"})
+    doc = await update_document(db["point_accumulations"], pa_id, pa_dict, request, response, "Point accumulation not found")
     doc["id"] = str(doc["_id"])
     return PointAccumulation(**doc)
 
+@router.patch("/point_accumulations/{pa_id}", response_model=PointAccumulation)
+async def patch_point_accumulation(pa_id: str, point_accumulation: PointAccumulationUpdate, request: Request, response: Response):
+    return await update_point_accumulation(pa_id, point_accumulation, request, response)
+
 @router.delete("/point_accumulations/{pa_id}")
 async def delete_point_accumulation(pa_id: str, request: Request):
     db = request.app.state.db
-    result = await db["point_accumulations"].delete_one({"_id": pa_id})
+    result = await db["point_accumulations"].delete_one(id_filter(pa_id))
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Point accumulation not found")
     return {"message": "Point accumulation deleted"}
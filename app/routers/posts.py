@@ -1,51 +1,81 @@
-from fastapi import APIRouter, HTTPException, Request
-from app.models import Post
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from pymongo import ReturnDocument
+from app.models import Post, PostUpdate, Reply
+from app.db import id_filter, update_document
+from app.replies import add_replies
+from app.counters import child_moved, child_removed, children_added, competitions_changed
+from app.pagination import PageParams, paginate
+from app.streaming import ExportParams, stream_documents
+from app.metrics import TimedRoute
+from typing import List, Optional
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
+
+# Maintained from the replies collection, never written by clients
+SERVER_FIELDS = {"id", "replies", "reply_count", "latest_replies"}
 
 @router.post("/posts/", response_model=Post)
 async def create_post(post: Post, request: Request):
     db = request.app.state.db
-    post_dict = post.dict(exclude_unset=True)
+    post_dict = post.dict(exclude_unset=True, exclude=SERVER_FIELDS)
     result = await db["posts"].insert_one(post_dict)
-    post_dict["id"] = str(result.inserted_id)
+    post_id = str(result.inserted_id)
+    await competitions_changed(request, await children_added(db, "posts", [post_dict]))
+    if post.replies:
+        await add_replies(db, post_id, [reply.dict(exclude_unset=True, exclude={"id"}) for reply in post.replies])
+        post_dict = await db["posts"].find_one({"_id": result.inserted_id})
+    post_dict["id"] = post_id
     return Post(**post_dict)
 
 @router.get("/posts/", response_model=List[Post])
-async def list_posts(request: Request):
+async def list_posts(request: Request, response: Response, competition_id: Optional[str] = None, page: PageParams = Depends()):
     db = request.app.state.db
-    cursor = db["posts"].find()
-    posts = []
-    async for doc in cursor:
-        doc["id"] = str(doc["_id"])
-        posts.append(Post(**doc))
-    return posts
+    query = {"competition_id": competition_id} if competition_id else {}
+    return await paginate(db["posts"], query, page, Post, response, sort_field="date", descending=True)
+
+@router.get("/posts/export")
+async def export_posts(request: Request, competition_id: Optional[str] = None, params: ExportParams = Depends()):
+    db = request.app.state.read_db
+    query = {"competition_id": competition_id} if competition_id else {}
+    return stream_documents(db["posts"], query, Post, params, sort_field="date", filename="posts")
 
 @router.get("/posts/{post_id}", response_model=Post)
 async def get_post(post_id: str, request: Request):
     db = request.app.state.db
-    doc = await db["posts"].find_one({"_id": post_id})
+    doc = await db["posts"].find_one(id_filter(post_id)) or await request.app.state.archive.find(db, "posts", post_id)
     if not doc:
         raise HTTPException(status_code=404, detail="Post not found")
     doc["id"] = str(doc["_id"])
     return Post(**doc)
 
+@router.get("/posts/{post_id}/replies", response_model=List[Reply])
+async def list_post_replies(post_id: str, request: Request, response: Response, page: PageParams = Depends()):
+    db = request.app.state.db
+    return await paginate(db["replies"], {"post_id": post_id}, page, Reply, response, sort_field="date")
+
 @router.put("/posts/{post_id}", response_model=Post)
-async def update_post(post_id: str, post: Post, request: Request):
+async def update_post(post_id: str, post: Post, request: Request, response: Response):
     db = request.app.state.db
-    post_dict = post.dict(exclude_unset=True)
-    await db["posts"].update_one({"_id": post_id}, {"$set": post_dict})
-    doc = await db["posts"].find_one({"_id": post_id})
-    if not doc:
-        raise HTTPException(status_code=404, detail="Post not found")
+    post_dict = post.dict(exclude_unset=True, exclude=SERVER_FIELDS)
+    before = await update_document(
+        db["posts"], post_id, post_dict, request, response, "Post not found",
+        return_document=ReturnDocument.BEFORE,
+    )
+    doc = {**before, **post_dict, "version": before.get("version", 0) + 1}
+    await competitions_changed(request, await child_moved(db, "posts", before, "posts", doc))
     doc["id"] = str(doc["_id"])
     return Post(**doc)
 
+@router.patch("/posts/{post_id}", response_model=Post)
+async def patch_post(post_id: str, post: PostUpdate, request: Request, response: Response):
+    return await update_post(post_id, post, request, response)
+
 @router.delete("/posts/{post_id}")
 async def delete_post(post_id: str, request: Request):
     db = request.app.state.db
-    result = await db["posts"].delete_one({"_id": post_id})
-    if result.deleted_count == 0:
+    doc = await db["posts"].find_one_and_delete(id_filter(post_id))
+    if not doc:
         raise HTTPException(status_code=404, detail="Post not found")
+    await competitions_changed(request, await child_removed(db, "posts", doc))
+    await db["replies"].delete_many({"post_id": post_id})
     return {"message": "Post deleted"}
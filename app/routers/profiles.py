@@ -1,9 +1,12 @@
-from fastapi import APIRouter, HTTPException, Request
-from app.models import Profile
-from typing import List
-from bson import ObjectId
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from app.models import Profile, ProfileUpdate
+from app.db import id_filter, update_document
+from app.cache import cached
+from app.search import MAX_SEARCH_RESULTS
+from app.metrics import TimedRoute
+from typing import List, Optional
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
 @router.post("/profiles/", response_model=Profile)
 async def create_profile(profile: Profile, request: Request):
@@ -16,59 +19,63 @@ async def create_profile(profile: Profile, request: Request):
         return Profile(**existing)
 
     result = await db["profiles"].insert_one(profile_dict)
+    await request.app.state.search.index(db, profile_dict)
     profile_dict["id"] = str(result.inserted_id)
     return Profile(**profile_dict)
 
 @router.get("/profiles/", response_model=List[Profile])
-async def list_profiles(request: Request, email: str = None):
-    db = request.app.state.db
-    query = {}
-    if email:
-        query["email"] = {"$regex": email, "$options": "i"}
+async def list_profiles(
+    request: Request,
+    q: Optional[str] = Query(None, description="Prefixes of the name or email to search for"),
+    email: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=MAX_SEARCH_RESULTS),
+):
+    db = request.app.state.read_db
+    text = q or email
+    if text:
+        docs = await request.app.state.search.search(db, text, limit)
+    else:
+        docs = await db["profiles"].find().limit(limit).to_list(length=limit)
 
-    cursor = db["profiles"].find(query).limit(20)
     profiles = []
-    async for doc in cursor:
+    for doc in docs:
         doc["id"] = str(doc["_id"])
         profiles.append(Profile(**doc))
     return profiles
 
 @router.get("/profiles/user/{user_id}", response_model=Profile)
-async def get_profile_by_user_id(user_id: str, request: Request):
+async def get_profile_by_user_id(user_id: str, request: Request, response: Response):
     db = request.app.state.db
-    doc = await db["profiles"].find_one({"user_id": user_id})
-    if not doc:
-        raise HTTPException(status_code=404, detail="Profile not found")
-    doc["id"] = str(doc["_id"])
-    return Profile(**doc)
+
+    async def load():
+        doc = await db["profiles"].find_one({"user_id": user_id})
+        if not doc:
+            raise HTTPException(status_code=404, detail="Profile not found")
+        doc["id"] = str(doc["_id"])
+        return Profile(**doc)
+
+    return await cached(request, response, "profile", [f"profile:{user_id}"], load)
 
 @router.get("/profiles/{profile_id}", response_model=Profile)
 async def get_profile(profile_id: str, request: Request):
     db = request.app.state.db
-    try:
-        doc = await db["profiles"].find_one({"_id": ObjectId(profile_id)})
-    except:
-        doc = await db["profiles"].find_one({"_id": profile_id})
-
+    doc = await db["profiles"].find_one(id_filter(profile_id))
     if not doc:
         raise HTTPException(status_code=404, detail="Profile not found")
     doc["id"] = str(doc["_id"])
     return Profile(**doc)
 
 @router.put("/profiles/{profile_id}", response_model=Profile)
-async def update_profile(profile_id: str, profile: Profile, request: Request):
+async def update_profile(profile_id: str, profile: Profile, request: Request, response: Response):
     db = request.app.state.db
     profile_dict = profile.dict(exclude_unset=True, exclude={"id", "created_at"})
-
-    try:
-        oid = ObjectId(profile_id)
-        await db["profiles"].update_one({"_id": oid}, {"$set": profile_dict})
-        doc = await db["profiles"].find_one({"_id": oid})
-    except:
-        await db["profiles"].update_one({"_id": profile_id}, {"$set": profile_dict})
-        doc = await db["profiles"].find_one({"_id": profile_id})
-
-    if not doc:
-        raise HTTPException(status_code=404, detail="Profile not found")
+    doc = await update_document(db["profiles"], profile_id, profile_dict, request, response, "Profile not found")
+    await request.app.state.cache.invalidate(f"profile:{doc['user_id']}")
+    if {"email", "full_name"} & profile_dict.keys():
+        await request.app.state.search.index(db, doc)
     doc["id"] = str(doc["_id"])
     return Profile(**doc)
+
+@router.patch("/profiles/{profile_id}", response_model=Profile)
+async def patch_profile(profile_id: str, profile: ProfileUpdate, request: Request, response: Response):
+    return await update_profile(profile_id, profile, request, response)
@@ -1,51 +1,73 @@
-from fastapi import APIRouter, HTTPException, Request
-from app.models import Reply
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from pymongo import ReturnDocument
+from app.models import Reply, ReplyUpdate
+from app.db import id_filter, update_document
+from app.replies import add_replies, refresh_post
+from app.pagination import PageParams, paginate
+from app.metrics import TimedRoute
 from typing import List
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
 @router.post("/replies/", response_model=Reply)
 async def create_reply(reply: Reply, request: Request):
     db = request.app.state.db
-    reply_dict = reply.dict(exclude_unset=True)
-    result = await db["replies"].insert_one(reply_dict)
-    reply_dict["id"] = str(result.inserted_id)
+    reply_dict = reply.dict(exclude_unset=True, exclude={"id"})
+    if reply.post_id:
+        if not await db["posts"].count_documents(id_filter(reply.post_id), limit=1):
+            raise HTTPException(status_code=404, detail="Post not found")
+        await add_replies(db, reply.post_id, [reply_dict])
+    else:
+        await db["replies"].insert_one(reply_dict)
+    reply_dict["id"] = str(reply_dict["_id"])
     return Reply(**reply_dict)
 
 @router.get("/replies/", response_model=List[Reply])
-async def list_replies(request: Request):
+async def list_replies(request: Request, response: Response, page: PageParams = Depends()):
     db = request.app.state.db
-    cursor = db["replies"].find()
-    replies = []
-    async for doc in cursor:
-        doc["id"] = str(doc["_id"])
-        replies.append(Reply(**doc))
-    return replies
+    return await paginate(db["replies"], {}, page, Reply, response, sort_field="date", descending=True)
 
 @router.get("/replies/{reply_id}", response_model=Reply)
 async def get_reply(reply_id: str, request: Request):
     db = request.app.state.db
-    doc = await db["replies"].find_one({"_id": reply_id})
+    doc = await db["replies"].find_one(id_filter(reply_id))
     if not doc:
         raise HTTPException(status_code=404, detail="Reply not found")
     doc["id"] = str(doc["_id"])
     return Reply(**doc)
 
 @router.put("/replies/{reply_id}", response_model=Reply)
-async def update_reply(reply_id: str, reply: Reply, request: Request):
+async def update_reply(reply_id: str, reply: Reply, request: Request, response: Response):
     db = request.app.state.db
-    reply_dict = reply.dict(exclude_unset=True)
-    await db["replies"].update_one({"_id": reply_id}, {"$set": reply_dict})
-    doc = await db["replies"].find_one({"_id": reply_id})
-    if not doc:
-        raise HTTPException(status_code=404, detail="Reply not found")
+    reply_dict = reply.dict(exclude_unset=True, exclude={"id"})
+    if reply_dict.get("post_id") and not await db["posts"].count_documents(id_filter(reply_dict["post_id"]), limit=1):
+        raise HTTPException(status_code=404, detail="Post not found")
+    before = await update_document(
+        db["replies"], reply_id, reply_dict, request, response, "Reply not found",
+        return_document=ReturnDocument.BEFORE,
+    )
+    doc = {**before, **reply_dict, "version": before.get("version", 0) + 1}
+    if before.get("post_id") != doc.get("post_id"):
+        # Moved to another post: both lose or gain one reply and their previews change
+        if before.get("post_id"):
+            await refresh_post(db, before["post_id"], count_change=-1)
+        if doc.get("post_id"):
+            await refresh_post(db, doc["post_id"], count_change=1)
+    elif doc.get("post_id"):
+        await refresh_post(db, doc["post_id"])
     doc["id"] = str(doc["_id"])
     return Reply(**doc)
 
+@router.patch("/replies/{reply_id}", response_model=Reply)
+async def patch_reply(reply_id: str, reply: ReplyUpdate, request: Request, response: Response):
+    return await update_reply(reply_id, reply, request, response)
+
 @router.delete("/replies/{reply_id}")
 async def delete_reply(reply_id: str, request: Request):
     db = request.app.state.db
-    result = await db["replies"].delete_one({"_id": reply_id})
-    if result.deleted_count == 0:
+    doc = await db["replies"].find_one_and_delete(id_filter(reply_id))
+    if not doc:
         raise HTTPException(status_code=404, detail="Reply not found")
+    if doc.get("post_id"):
+        await refresh_post(db, doc["post_id"], count_change=-1)
     return {"message": "Reply deleted"}
@@ -1,8 +1,11 @@
-from fastapi import APIRouter, HTTPException, Request
-from app.models import Rule
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from app.models import Rule, RuleUpdate
+from app.db import id_filter, update_document
+from app.pagination import PageParams, paginate
+from app.metrics import TimedRoute
 from typing import List
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
 @router.post("/rules/", response_model=Rule)
 async def create_rule(rule: Rule, request: Request):
@@ -13,39 +16,35 @@ async def create_rule(rule: Rule, request: Request):
     return Rule(**rule_dict)
 
 @router.get("/rules/", response_model=List[Rule])
-async def list_rules(request: Request):
+async def list_rules(request: Request, response: Response, page: PageParams = Depends()):
     db = request.app.state.db
-    cursor = db["rules"].find()
-    rules = []
-    async for doc in cursor:
-        doc["id"] = str(doc["_id"])
-        rules.append(Rule(**doc))
-    return rules
+    return await paginate(db["rules"], {}, page, Rule, response)
 
 @router.get("/rules/{rule_id}", response_model=Rule)
 async def get_rule(rule_id: str, request: Request):
     db = request.app.state.db
-    doc = await db["rules"].find_one({"_id": rule_id})
+    doc = await db["rules"].find_one(id_filter(rule_id))
     if not doc:
         raise HTTPException(status_code=404, detail="Rule not found")
     doc["id"] = str(doc["_id"])
     return Rule(**doc)
 
 @router.put("/rules/{rule_id}", response_model=Rule)
-async def update_rule(rule_id: str, rule: Rule, request: Request):
+async def update_rule(rule_id: str, rule: Rule, request: Request, response: Response):
     db = request.app.state.db
-    rule_dict = rule.dict(exclude_unset=True)
-    await db["rules"].update_one({"_id": rule_id}, {"$set": rule_dict})
-    doc = await db["rules"].find_one({"_id": rule_id})
-    if not doc:
-        raise HTTPException(status_code=404, detail="Rule not found")
+    rule_dict = rule.dict(exclude_unset=True, exclude={"id"})
+    doc = await update_document(db["rules"], rule_id, rule_dict, request, response, "Rule not found")
     doc["id"] = str(doc["_id"])
     return Rule(**doc)
 
+@router.patch("/rules/{rule_id}", response_model=Rule)
+async def patch_rule(rule_id: str, rule: RuleUpdate, request: Request, response: Response):
+    return await update_rule(rule_id, rule, request, response)
+
 @router.delete("/rules/{rule_id}")
 async def delete_rule(rule_id: str, request: Request):
     db = request.app.state.db
-    result = await db["rules"].delete_one({"_id": rule_id})
+    result = await db["rules"].delete_one(id_filter(rule_id))
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Rule not found")
     return {"message": "Rule deleted"}
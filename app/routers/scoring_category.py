@@ -1,8 +1,11 @@
-from fastapi import APIRouter, HTTPException, Request
-from app.models import ScoringCategory
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from app.models import ScoringCategory, ScoringCategoryUpdate
+from app.db import id_filter, update_document
+from app.pagination import PageParams, paginate
+from app.metrics import TimedRoute
 from typing import List
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
 @router.post("/scoring_categories/", response_model=ScoringCategory)
 async def create_scoring_category(category: ScoringCategory, request: Request):
@@ -13,39 +16,35 @@ async def create_scoring_category(category: ScoringCategory, request: Request):
     return ScoringCategory(**category_dict)
 
 @router.get("/scoring_categories/", response_model=List[ScoringCategory])
-async def list_scoring_categories(request: Request):
+async def list_scoring_categories(request: Request, response: Response, page: PageParams = Depends()):
     db = request.app.state.db
-    cursor = db["scoring_categories"].find()
-    categories = []
-    async for doc in cursor:
-        doc["id"] = str(doc["_id"])
-        categories.append(ScoringCategory(**doc))
-    return categories
+    return await paginate(db["scoring_categories"], {}, page, ScoringCategory, response)
 
 @router.get("/scoring_categories/{category_id}", response_model=ScoringCategory)
 async def get_scoring_category(category_id: str, request: Request):
     db = request.app.state.db
-    doc = await db["scoring_categories"].find_one({"_id": category_id})
+    doc = await db["scoring_categories"].find_one(id_filter(category_id))
     if not doc:
         raise HTTPException(status_code=404, detail="Scoring category not found")
     doc["id"] = str(doc["_id"])
     return ScoringCategory(**doc)
 
 @router.put("/scoring_categories/{category_id}", response_model=ScoringCategory)
-async def update_scoring_category(category_id: str, category: ScoringCategory, request: Request):
+async def update_scoring_category(category_id: str, category: ScoringCategory, request: Request, response: Response):
     db = request.app.state.db
-    category_dict = category.dict(exclude_unset=True)
-    await db["scoring_categories"].update_one({"_id": category_id}, {"$set": category_dict})
-    doc = await db["scoring_categories"].find_one({"_id": category_id})
-    if not doc:
-        raise HTTPException(status_code=404, detail="Scoring category not found")
+    category_dict = category.dict(exclude_unset=True, exclude={"id"})
+    doc = await update_document(db["scoring_categories"], category_id, category_dict, request, response, "Scoring category not found")
     doc["id"] = str(doc["_id"])
     return ScoringCategory(**doc)
 
+@router.patch("/scoring_categories/{category_id}", response_model=ScoringCategory)
+async def patch_scoring_category(category_id: str, category: ScoringCategoryUpdate, request: Request, response: Response):
+    return await update_scoring_category(category_id, category, request, response)
+
 @router.delete("/scoring_categories/{category_id}")
 async def delete_scoring_category(category_id: str, request: Request):
     db = request.app.state.db
-    result = await db["scoring_categories"].delete_one({"_id": category_id})
+    result = await db["scoring_categories"].delete_one(id_filter(category_id))
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Scoring category not found")
     return {"message": "Scoring category deleted"}
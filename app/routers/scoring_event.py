@@ -1,8 +1,12 @@
-from fastapi import APIRouter, HTTPException, Request
-from app.models import ScoringEvent
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from app.models import ScoringEvent, ScoringEventUpdate
+from app.db import id_filter, update_document
+from app.realtime import publish_scoring_event
+from app.pagination import PageParams, paginate
+from app.metrics import TimedRoute
 from typing import List
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
 @router.post("/scoring_events/", response_model=ScoringEvent)
 async def create_scoring_event(event: ScoringEvent, request: Request):
@@ -10,42 +14,40 @@ async def create_scoring_event(event: ScoringEvent, request: Request):
     event_dict = event.dict(exclude_unset=True)
     result = await db["scoring_events"].insert_one(event_dict)
     event_dict["id"] = str(result.inserted_id)
-    return ScoringEvent(**event_dict)
+    created = ScoringEvent(**event_dict)
+    await publish_scoring_event(request.app.state.broker, created.dict())
+    return created
 
 @router.get("/scoring_events/", response_model=List[ScoringEvent])
-async def list_scoring_events(request: Request):
+async def list_scoring_events(request: Request, response: Response, page: PageParams = Depends()):
     db = request.app.state.db
-    cursor = db["scoring_events"].find()
-    events = []
-    async for doc in cursor:
-        doc["id"] = str(doc["_id"])
-        events.append(ScoringEvent(**doc))
-    return events
+    return await paginate(db["scoring_events"], {}, page, ScoringEvent, response)
 
 @router.get("/scoring_events/{event_id}", response_model=ScoringEvent)
 async def get_scoring_event(event_id: str, request: Request):
     db = request.app.state.db
-    doc = await db["scoring_events"].find_one({"_id": event_id})
+    doc = await db["scoring_events"].find_one(id_filter(event_id))
     if not doc:
         raise HTTPException(status_code=404, detail="Scoring event not found")
     doc["id"] = str(doc["_id"])
     return ScoringEvent(**doc)
 
 @router.put("/scoring_events/{event_id}", response_model=ScoringEvent)
-async def update_scoring_event(event_id: str, event: ScoringEvent, request: Request):
+async def update_scoring_event(event_id: str, event: ScoringEvent, request: Request, response: Response):
     db = request.app.state.db
-    event_dict = event.dict(exclude_unset=True)
-    await db["scoring_events"].update_one({"_id": event_id}, {"$set": event_dict})
-    doc = await db["scoring_events"].find_one({"_id": event_id})
-    if not doc:
-        raise HTTPException(status_code=404, detail="Scoring event not found")
+    event_dict = event.dict(exclude_unset=True, exclude={"id"})
+    doc = await update_document(db["scoring_events"], event_id, event_dict, request, response, "Scoring event not found")
     doc["id"] = str(doc["_id"])
     return ScoringEvent(**doc)
 
+@router.patch("/scoring_events/{event_id}", response_model=ScoringEvent)
+async def patch_scoring_event(event_id: str, event: ScoringEventUpdate, request: Request, response: Response):
+    return await update_scoring_event(event_id, event, request, response)
+
 @router.delete("/scoring_events/{event_id}")
 async def delete_scoring_event(event_id: str, request: Request):
     db = request.app.state.db
-    result = await db["scoring_events"].delete_one({"_id": event_id})
+    result = await db["scoring_events"].delete_one(id_filter(event_id))
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Scoring event not found")
     return {"message": "Scoring event deleted"}
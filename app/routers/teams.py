@@ -1,51 +1,79 @@
-from fastapi import APIRouter, HTTPException, Request
-from app.models import Team
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from pymongo import ReturnDocument
+from app.models import BulkResult, Team, TeamUpdate
+from app.bulk import bulk_insert
+from app.db import id_filter, update_document
+from app.counters import child_moved, child_removed, children_added, competitions_changed
+from app.pagination import PageParams, paginate
+from app.standings import cache_namespaces
+from app.metrics import TimedRoute
+from typing import Iterable, List, Optional
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
+
+async def standings_teams_changed(request: Request, teams: Iterable[dict]):
+    # Standings list every team of the competition, even those yet to play
+    for competition_id in {team.get("competition_id") for team in teams} - {None}:
+        await request.app.state.cache.invalidate(*cache_namespaces(competition_id))
 
 @router.post("/teams/", response_model=Team)
 async def create_team(team: Team, request: Request):
     db = request.app.state.db
     team_dict = team.dict(exclude_unset=True)
     result = await db["teams"].insert_one(team_dict)
+    await competitions_changed(request, await children_added(db, "participants", [team_dict]))
+    await standings_teams_changed(request, [team_dict])
     team_dict["id"] = str(result.inserted_id)
     return Team(**team_dict)
 
+@router.post("/teams/bulk", response_model=BulkResult)
+async def create_teams_bulk(request: Request):
+    db = request.app.state.db
+    result, inserted = await bulk_insert(request, db["teams"], Team)
+    await competitions_changed(request, await children_added(db, "participants", inserted))
+    await standings_teams_changed(request, inserted)
+    return result
+
 @router.get("/teams/", response_model=List[Team])
-async def list_teams(request: Request):
+async def list_teams(request: Request, response: Response, competition_id: Optional[str] = None, page: PageParams = Depends()):
     db = request.app.state.db
-    cursor = db["teams"].find()
-    teams = []
-    async for doc in cursor:
-        doc["id"] = str(doc["_id"])
-        teams.append(Team(**doc))
-    return teams
+    query = {"competition_id": competition_id} if competition_id else {}
+    return await paginate(db["teams"], query, page, Team, response)
 
 @router.get("/teams/{team_id}", response_model=Team)
 async def get_team(team_id: str, request: Request):
     db = request.app.state.db
-    doc = await db["teams"].find_one({"_id": team_id})
+    doc = await db["teams"].find_one(id_filter(team_id))
     if not doc:
         raise HTTPException(status_code=404, detail="Team not found")
     doc["id"] = str(doc["_id"])
     return Team(**doc)
 
 @router.put("/teams/{team_id}", response_model=Team)
-async def update_team(team_id: str, team: Team, request: Request):
+async def update_team(team_id: str, team: Team, request: Request, response: Response):
     db = request.app.state.db
-    team_dict = team.dict(exclude_unset=True)
-    await db["teams"].update_one({"_id": team_id}, {"$set": team_dict})
-    doc = await db["teams"].find_one({"_id": team_id})
-    if not doc:
-        raise HTTPException(status_code=404, detail="Team not found")
+    team_dict = team.dict(exclude_unset=True, exclude={"id"})
+    before = await update_document(
+        db["teams"], team_id, team_dict, request, response, "Team not found",
+        return_document=ReturnDocument.BEFORE,
+    )
+    doc = {**before, **team_dict, "version": before.get("version", 0) + 1}
+    if before.get("competition_id") != doc.get("competition_id"):
+        await competitions_changed(request, await child_moved(db, "participants", before, "participants", doc))
+        await standings_teams_changed(request, [before, doc])
     doc["id"] = str(doc["_id"])
     return Team(**doc)
 
+@router.patch("/teams/{team_id}", response_model=Team)
+async def patch_team(team_id: str, team: TeamUpdate, request: Request, response: Response):
+    return await update_team(team_id, team, request, response)
+
 @router.delete("/teams/{team_id}")
 async def delete_team(team_id: str, request: Request):
     db = request.app.state.db
-    result = await db["teams"].delete_one({"_id": team_id})
-    if result.deleted_count == 0:
+    doc = await db["teams"].find_one_and_delete(id_filter(team_id))
+    if not doc:
         raise HTTPException(status_code=404, detail="Team not found")
+    await competitions_changed(request, await child_removed(db, "participants", doc))
+    await standings_teams_changed(request, [doc])
     return {"message": "Team deleted"}
@@ -0,0 +1,206 @@
+import math
+import random
+from collections import Counter
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+ROUND_ROBIN = "round_robin"
+DOUBLE_ROUND_ROBIN = "double_round_robin"
+KNOCKOUT = "knockout"
+FORMATS = (ROUND_ROBIN, DOUBLE_ROUND_ROBIN, KNOCKOUT)
+
+# Competition.type values that imply a schedule format
+TYPE_FORMATS = {
+    "league": ROUND_ROBIN,
+    "round_robin": ROUND_ROBIN,
+    "double_round_robin": DOUBLE_ROUND_ROBIN,
+    "knockout": KNOCKOUT,
+    "cup": KNOCKOUT,
+}
+
+DAY_NAMES = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
+
+# A pairing is (home, away); in knockout brackets either side may be a placeholder label
+Pairing = Tuple[str, str]
+
+
+def round_robin_rounds(team_ids: List[str]) -> List[List[Pairing]]:
+    """Circle-method round robin: every team meets every other team once."""
+    slots: List[Optional[str]] = list(team_ids)
+    if len(slots) % 2:
+        slots.append(None)
+    n = len(slots)
+    rounds = []
+    for r in range(n - 1):
+        pairs = []
+        for i in range(n // 2):
+            a, b = slots[i], slots[n - 1 - i]
+            if a is None or b is None:
+                continue
+            pairs.append((a, b) if (r + i) % 2 == 0 else (b, a))
+        rounds.append(pairs)
+        slots = [slots[0], slots[-1], *slots[1:-1]]
+    return rounds
+
+
+def double_round_robin_rounds(team_ids: List[str]) -> List[List[Pairing]]:
+    first_half = round_robin_rounds(team_ids)
+    return first_half + [[(away, home) for home, away in pairs] for pairs in first_half]
+
+
+def knockout_rounds(team_ids: List[str]) -> List[List[Pairing]]:
+    """Single elimination bracket; later rounds reference earlier winners by label.
+
+    When the field is not a power of two the first teams get byes into round two.
+    """
+    if len(team_ids) < 2:
+        return []
+    size = 1 << math.ceil(math.log2(len(team_ids)))
+    byes = size - len(team_ids)
+    playing = team_ids[byes:]
+
+    first = [(playing[i], playing[len(playing) - 1 - i]) for i in range(len(playing) // 2)]
+    rounds = [first]
+    entrants = list(team_ids[:byes]) + [f"Winner R1M{m + 1}" for m in range(len(first))]
+    r = 2
+    while len(entrants) > 1:
+        pairs = [(entrants[i], entrants[len(entrants) - 1 - i]) for i in range(len(entrants) // 2)]
+        rounds.append(pairs)
+        entrants = [f"Winner R{r}M{m + 1}" for m in range(len(pairs))]
+        r += 1
+    return rounds
+
+
+def build_rounds(schedule_format: str, team_ids: List[str], seed: Optional[int] = None) -> List[List[Pairing]]:
+    team_ids = list(team_ids)
+    if seed is not None:
+        random.Random(seed).shuffle(team_ids)
+    if schedule_format == ROUND_ROBIN:
+        return round_robin_rounds(team_ids)
+    if schedule_format == DOUBLE_ROUND_ROBIN:
+        return double_round_robin_rounds(team_ids)
+    return knockout_rounds(team_ids)
+
+
+def last_slot_fits_day(kickoff: time, matches_per_venue_per_day: int, slot_minutes: int) -> bool:
+    """Whether the day's last slot at a venue still starts on the same day as the first."""
+    first = kickoff.hour * 60 + kickoff.minute
+    return first + slot_minutes * (matches_per_venue_per_day - 1) < 24 * 60
+
+
+class SlotPlan:
+    """Kick-off times and venues for a season's rounds, worked out on demand.
+
+    Each venue hosts ``matches_per_venue_per_day`` matches a day, ``slot_minutes``
+    apart. A round spans as many days as it needs, and the next round starts
+    after at least ``rest_days`` free days, so no team plays twice within that gap.
+    Only the first day of each round is stored; the season's first and last
+    kick-offs follow from those without visiting every match.
+    """
+
+    def __init__(
+        self,
+        rounds: List[List[Pairing]],
+        venues: List[str],
+        start_date: date,
+        kickoff: time,
+        rest_days: int = 0,
+        matches_per_venue_per_day: int = 1,
+        slot_minutes: int = 120,
+    ):
+        self.rounds = rounds
+        self.venues = venues
+        self.per_day = len(venues) * matches_per_venue_per_day
+        self.base = datetime.combine(start_date, kickoff)
+        self.slot_offsets = [timedelta(minutes=slot_minutes * (s // len(venues))) for s in range(self.per_day)]
+        self.start_days = []
+        day = 0
+        for pairs in rounds:
+            self.start_days.append(day)
+            # A round whose pairings were all played already takes no days
+            if pairs:
+                day += math.ceil(len(pairs) / self.per_day) + rest_days
+
+    def kickoff_at(self, round_index: int, match_index: int) -> datetime:
+        day, slot = divmod(match_index, self.per_day)
+        return self.base + timedelta(days=self.start_days[round_index] + day) + self.slot_offsets[slot]
+
+    def first_kickoff(self) -> Optional[datetime]:
+        for r, pairs in enumerate(self.rounds):
+            if pairs:
+                return self.kickoff_at(r, 0)
+        return None
+
+    def last_kickoff(self) -> Optional[datetime]:
+        # Kick-offs never go backwards within a round, and each round starts after the previous one
+        for r in reversed(range(len(self.rounds))):
+            if self.rounds[r]:
+                return self.kickoff_at(r, len(self.rounds[r]) - 1)
+        return None
+
+    def matches(self) -> Iterator[Tuple[int, Pairing, datetime, str]]:
+        """(round number, pairing, kick-off, venue) of every match in schedule order."""
+        for r, pairs in enumerate(self.rounds):
+            for first in range(0, len(pairs), self.per_day):
+                day_start = self.base + timedelta(days=self.start_days[r] + first // self.per_day)
+                for s, pairing in enumerate(pairs[first:first + self.per_day]):
+                    yield r + 1, pairing, day_start + self.slot_offsets[s], self.venues[s % len(self.venues)]
+
+
+def without_played(rounds: List[List[Pairing]], played: Iterable[Pairing]) -> List[List[Pairing]]:
+    """Drop pairings already played; each completed fixture cancels one meeting of its two teams."""
+    remaining = Counter(frozenset(pairing) for pairing in played)
+    if not remaining:
+        return rounds
+    kept = []
+    for pairs in rounds:
+        keep = []
+        for pairing in pairs:
+            key = frozenset(pairing)
+            if remaining[key]:
+                remaining[key] -= 1
+            else:
+                keep.append(pairing)
+        kept.append(keep)
+    return kept
+
+
+def fixture_count(rounds: List[List[Pairing]], team_ids: List[str]) -> int:
+    """Number of fixtures ``fixture_documents`` yields: matches whose teams are both known."""
+    known = set(team_ids)
+    return sum(1 for pairs in rounds for home, away in pairs if home in known and away in known)
+
+
+def fixture_documents(competition_id: str, plan: SlotPlan, team_ids: List[str]) -> Iterator[Dict]:
+    """Fixture documents for every scheduled match whose teams are both known, built as they are consumed."""
+    known = set(team_ids)
+    for round_number, (home, away), kickoff_at, venue in plan.matches():
+        if home not in known or away not in known:
+            continue
+        yield {
+            "competition_id": competition_id,
+            "round": round_number,
+            "date_time": kickoff_at,
+            "day": DAY_NAMES[kickoff_at.weekday()],
+            "location": venue,
+            "is_complete": False,
+            "teams": [{"team_id": home, "score": 0}, {"team_id": away, "score": 0}],
+            "scoring_events": [],
+        }
+
+
+def plan_schedule(
+    schedule_format: str,
+    team_ids: List[str],
+    venues: List[str],
+    start_date: date,
+    kickoff: time,
+    rest_days: int = 0,
+    matches_per_venue_per_day: int = 1,
+    slot_minutes: int = 120,
+    seed: Optional[int] = None,
+    played: Iterable[Pairing] = (),
+) -> SlotPlan:
+    """Build the rounds of a competition, less any pairings in ``played``, and their kick-off slots."""
+    rounds = without_played(build_rounds(schedule_format, team_ids, seed), played)
+    return SlotPlan(rounds, venues, start_date, kickoff, rest_days, matches_per_venue_per_day, slot_minutes)
@@ -0,0 +1,161 @@
+import re
+import unicodedata
+from typing import Dict, Iterable, List, Optional, Set
+
+MAX_SEARCH_RESULTS = 50
+# Candidates read per query before ranking; typeahead only ever shows the top few
+CANDIDATE_FACTOR = 5
+
+
+def normalise(text: Optional[str]) -> str:
+    """Lower-case, accent-free form used for both keys and queries."""
+    if not text:
+        return ""
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).casefold().strip()
+
+
+def search_terms(query: str) -> List[str]:
+    return [term for term in re.split(r"\s+", normalise(query)) if term]
+
+
+def search_keys(profile: dict) -> List[str]:
+    """Prefix keys for a profile: the email, its local part and domain, the full name and each name word."""
+    keys = set()
+    email = normalise(profile.get("email"))
+    if email:
+        keys.add(email)
+        keys.update(part for part in email.split("@") if part)
+    name = normalise(profile.get("full_name"))
+    if name:
+        keys.add(name)
+        keys.update(name.split())
+    return sorted(keys)
+
+
+def rank(profiles: Iterable[dict], terms: List[str], limit: int) -> List[dict]:
+    """Order matches: exact key hits first, then prefix hits, then shorter names."""
+    def score(profile):
+        keys = profile.get("search_keys") or search_keys(profile)
+        points = sum(max((2 if key == term else 1 for key in keys if key.startswith(term)), default=0) for term in terms)
+        label = profile.get("full_name") or profile.get("email") or ""
+        return -points, len(label), label
+
+    return sorted(profiles, key=score)[:limit]
+
+
+class MongoProfileSearch:
+    """Search over a ``search_keys`` array on each profile, served by a multikey index.
+
+    Anchored, case-sensitive regexes on the already normalised keys become index
+    range scans, unlike the unanchored case-insensitive regex they replace.
+    """
+
+    async def index(self, db, profile: dict):
+        await db["profiles"].update_one({"_id": profile["_id"]}, {"$set": {"search_keys": search_keys(profile)}})
+
+    async def remove(self, db, profile: dict):
+        await db["profiles"].update_one({"_id": profile["_id"]}, {"$unset": {"search_keys": ""}})
+
+    async def search(self, db, query: str, limit: int) -> List[dict]:
+        terms = search_terms(query)
+        if not terms:
+            return []
+        prefixes = [{"search_keys": {"$regex": "^" + re.escape(term)}} for term in terms]
+        # Prefix matches come back in no useful order, so read the best tiers first
+        # (every term an exact key, then at least one) before filling up with the rest
+        tiers = [{"search_keys": {"$all": terms}}]
+        if len(terms) > 1:
+            tiers.append({"$and": [*prefixes, {"search_keys": {"$in": terms}}]})
+        tiers.append(prefixes[0] if len(prefixes) == 1 else {"$and": prefixes})
+
+        wanted = limit * CANDIDATE_FACTOR
+        candidates: Dict[object, dict] = {}
+        for tier in tiers:
+            if len(candidates) >= wanted:
+                break
+            query_filter = {"$and": [tier, {"_id": {"$nin": list(candidates)}}]} if candidates else tier
+            async for profile in db["profiles"].find(query_filter).limit(wanted - len(candidates)):
+                candidates[profile["_id"]] = profile
+        return rank(candidates.values(), terms, limit)
+
+    async def backfill(self, db) -> int:
+        count = 0
+        async for profile in db["profiles"].find({"search_keys": {"$exists": False}}):
+            await self.index(db, profile)
+            count += 1
+        return count
+
+
+class _TrieNode:
+    __slots__ = ("children", "ids")
+
+    def __init__(self):
+        self.children: Dict[str, "_TrieNode"] = {}
+        self.ids: Set[str] = set()
+
+
+class MemoryProfileSearch:
+    """In-process trie over the same keys, for deployments without the multikey index.
+
+    Every node holds the ids of all profiles with a key under it, so a prefix
+    lookup costs one walk down the trie regardless of how many profiles match.
+    It only knows the profiles it has been given, so ``backfill`` it at start-up.
+    """
+
+    def __init__(self):
+        self.root = _TrieNode()
+        self.profiles: Dict[str, dict] = {}
+        self._keys: Dict[str, List[str]] = {}
+
+    def _walk(self, key: str, create: bool = False) -> Optional[_TrieNode]:
+        node = self.root
+        for char in key:
+            child = node.children.get(char)
+            if child is None:
+                if not create:
+                    return None
+                child = node.children[char] = _TrieNode()
+            node = child
+        return node
+
+    async def index(self, db, profile: dict):
+        await self.remove(db, profile)
+        profile_id = str(profile["_id"])
+        keys = search_keys(profile)
+        for key in keys:
+            node = self.root
+            node.ids.add(profile_id)
+            for char in key:
+                node = node.children.setdefault(char, _TrieNode())
+                node.ids.add(profile_id)
+        self.profiles[profile_id] = {**profile, "search_keys": keys}
+        self._keys[profile_id] = keys
+
+    async def remove(self, db, profile: dict):
+        profile_id = str(profile["_id"])
+        for key in self._keys.pop(profile_id, []):
+            node = self.root
+            node.ids.discard(profile_id)
+            for char in key:
+                node = node.children[char]
+                node.ids.discard(profile_id)
+        self.profiles.pop(profile_id, None)
+
+    async def search(self, db, query: str, limit: int) -> List[dict]:
+        terms = search_terms(query)
+        if not terms:
+            return []
+        matches: Optional[Set[str]] = None
+        for term in terms:
+            node = self._walk(term)
+            ids = node.ids if node else set()
+            matches = set(ids) if matches is None else matches & ids
+        return rank((self.profiles[i] for i in matches), terms, limit)
+
+    async def backfill(self, db) -> int:
+        count = 0
+        async for profile in db["profiles"].find():
+            await self.index(db, profile)
+            count += 1
+        return count
@@ -0,0 +1,42 @@
+import os
+from dataclasses import dataclass, fields
+from typing import Mapping, Optional
+
+# Local development only; deployments set MONGO_URL (credentials never live in code)
+DEFAULT_MONGO_URL = "mongodb://localhost:27017"
+
+
+@dataclass(frozen=True)
+class Settings:
+    """Runtime configuration, read from environment variables of the same name in upper case."""
+
+    mongo_url: str = DEFAULT_MONGO_URL
+    mongo_db: str = "fair_measure_db"
+    # Connection pool: requests wait at most wait_queue_timeout_ms for a free connection
+    mongo_max_pool_size: int = 100
+    mongo_min_pool_size: int = 5
+    mongo_max_idle_time_ms: int = 60000
+    mongo_wait_queue_timeout_ms: int = 2000
+    mongo_server_selection_timeout_ms: int = 5000
+    mongo_connect_timeout_ms: int = 5000
+    mongo_socket_timeout_ms: int = 15000
+    # Used by read-only routes that tolerate slightly stale data (exports, feed, search)
+    mongo_read_preference: str = "secondaryPreferred"
+    mongo_max_staleness_seconds: Optional[int] = None
+    # Requests slower than this are logged with their DB and serialisation breakdown
+    slow_request_ms: int = 1000
+    # Background jobs (cascade deletes, archiving) run on this many worker tasks per process
+    job_workers: int = 2
+    job_max_attempts: int = 5
+    # Archived documents go to gzip NDJSON files under this directory, or to *_archive collections when empty
+    archive_dir: str = ""
+
+    @classmethod
+    def from_env(cls, environ: Mapping[str, str] = os.environ) -> "Settings":
+        values = {}
+        for field in fields(cls):
+            raw = environ.get(field.name.upper())
+            if raw is None or raw == "":
+                continue
+            values[field.name] = raw if field.type in (str, "str") else int(raw)
+        return cls(**values)
@@ -0,0 +1,150 @@
+from typing import Dict, List, Optional, Set
+from pymongo import UpdateOne
+from app.archive import ARCHIVED_FLAG, archived_fixtures
+from app.db import id_filter
+
+STAT_FIELDS = ("mp", "w", "d", "l", "gf", "ga", "gd", "pts")
+
+DEFAULT_POINTS = {"win": 3, "draw": 1, "lose": 0}
+
+STANDINGS_SORT = [("pts", -1), ("gd", -1), ("gf", -1), ("team_id", 1)]
+
+
+async def get_points(db, competition_id: str) -> dict:
+    doc = await db["competitions"].find_one(id_filter(competition_id), {"point_accumulation": 1})
+    if not doc or not doc.get("point_accumulation"):
+        return DEFAULT_POINTS
+    return doc["point_accumulation"]
+
+
+def fixture_delta(fixture: dict, points: dict) -> Dict[str, Dict[str, int]]:
+    """Per-team league table increments for a single completed two-team fixture."""
+    teams = fixture.get("teams") or []
+    if len(teams) != 2:
+        return {}
+
+    delta = {}
+    for team, opponent in ((teams[0], teams[1]), (teams[1], teams[0])):
+        gf, ga = team["score"], opponent["score"]
+        won, drawn, lost = int(gf > ga), int(gf == ga), int(gf < ga)
+        delta[team["team_id"]] = {
+            "mp": 1,
+            "w": won,
+            "d": drawn,
+            "l": lost,
+            "gf": gf,
+            "ga": ga,
+            "gd": gf - ga,
+            "pts": won * points["win"] + drawn * points["draw"] + lost * points["lose"],
+        }
+    return delta
+
+
+def cache_namespaces(competition_id: str) -> List[str]:
+    # Response cache namespaces covering every league table listing of a competition
+    return ["league_table", f"league_table:{competition_id}"]
+
+
+async def fixture_change_deltas(db, before: Optional[dict], after: Optional[dict]) -> Dict[str, Dict[str, Dict[str, int]]]:
+    """Net league table change, per competition and team, of a fixture moving from ``before`` to ``after``."""
+    net: Dict[str, Dict[str, Dict[str, int]]] = {}
+    for fixture, sign in ((before, -1), (after, 1)):
+        if not fixture or not fixture.get("is_complete"):
+            continue
+        points = await get_points(db, fixture["competition_id"])
+        for team_id, stats in fixture_delta(fixture, points).items():
+            row = net.setdefault(fixture["competition_id"], {}).setdefault(team_id, dict.fromkeys(STAT_FIELDS, 0))
+            for field, value in stats.items():
+                row[field] += sign * value
+
+    # Re-saving a completed fixture with the same score nets out to nothing
+    net = {cid: {t: row for t, row in teams.items() if any(row.values())} for cid, teams in net.items()}
+    return {cid: teams for cid, teams in net.items() if teams}
+
+
+async def apply_fixture_change(db, before: Optional[dict], after: Optional[dict]) -> Dict[str, Dict[str, Dict[str, int]]]:
+    """Move the league table from a fixture's old state to its new one.
+
+    ``before``/``after`` are the fixture document pre- and post-images; either may be
+    None for inserts and deletes. Only completed fixtures contribute to the table.
+    Returns the deltas applied, keyed by competition and team (empty if none).
+    """
+    deltas = await fixture_change_deltas(db, before, after)
+    for competition_id, teams in deltas.items():
+        for team_id, row in teams.items():
+            await db["league_table"].update_one(
+                {"competition_id": competition_id, "team_id": team_id},
+                {"$inc": {**row, "version": 1}},
+                upsert=True,
+            )
+    return deltas
+
+
+async def apply_fixtures_bulk(db, fixtures: List[dict]) -> Set[str]:
+    """Add many newly inserted fixtures to the table with one bulk write.
+
+    Returns the ids of the competitions whose table changed.
+    """
+    points_by_competition = {}
+    totals: Dict[tuple, Dict[str, int]] = {}
+    for fixture in fixtures:
+        if not fixture.get("is_complete"):
+            continue
+        competition_id = fixture["competition_id"]
+        if competition_id not in points_by_competition:
+            points_by_competition[competition_id] = await get_points(db, competition_id)
+        for team_id, stats in fixture_delta(fixture, points_by_competition[competition_id]).items():
+            row = totals.setdefault((competition_id, team_id), dict.fromkeys(STAT_FIELDS, 0))
+            for field, value in stats.items():
+                row[field] += value
+
+    if totals:
+        await db["league_table"].bulk_write([
+            UpdateOne(
+                {"competition_id": competition_id, "team_id": team_id},
+                {"$inc": {**row, "version": 1}},
+                upsert=True,
+            )
+            for (competition_id, team_id), row in totals.items()
+        ], ordered=False)
+    return {competition_id for competition_id, _ in totals}
+
+
+async def rebuild_competition(db, competition_id: str, archive=None) -> int:
+    """Recompute a competition's league table from its completed fixtures.
+
+    Fixtures of archived seasons are read back from ``archive`` so the rebuilt
+    table still covers them.
+    """
+    points = await get_points(db, competition_id)
+    totals: Dict[str, Dict[str, int]] = {}
+
+    cursor = db["fixtures"].find(
+        {"competition_id": competition_id, "is_complete": True},
+        {"competition_id": 1, "is_complete": 1, "teams": 1},
+    )
+    fixtures = [doc async for doc in cursor]
+    if archive is not None:
+        competition = await db["competitions"].find_one(id_filter(competition_id), {ARCHIVED_FLAG: 1})
+        if competition:
+            fixtures += await archived_fixtures(db, archive, competition)
+    for fixture in fixtures:
+        for team_id, stats in fixture_delta(fixture, points).items():
+            row = totals.setdefault(team_id, dict.fromkeys(STAT_FIELDS, 0))
+            for field, value in stats.items():
+                row[field] += value
+
+    if totals:
+        await db["league_table"].bulk_write([
+            UpdateOne(
+                {"competition_id": competition_id, "team_id": team_id},
+                {"$set": row, "$inc": {"version": 1}},
+                upsert=True,
+            )
+            for team_id, row in totals.items()
+        ], ordered=False)
+    await db["league_table"].delete_many({
+        "competition_id": competition_id,
+        "team_id": {"$nin": list(totals)},
+    })
+    return len(totals)
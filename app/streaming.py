@@ -0,0 +1,78 @@
+from typing import AsyncIterator, List, Literal, Optional, Type
+from fastapi import Query
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "json": "application/json",
+}
+
+DEFAULT_BATCH_SIZE = 500
+MAX_BATCH_SIZE = 5000
+
+
+class ExportParams:
+    def __init__(
+        self,
+        format: Literal["ndjson", "json"] = "ndjson",
+        batch_size: int = Query(DEFAULT_BATCH_SIZE, ge=1, le=MAX_BATCH_SIZE),
+    ):
+        self.format = format
+        self.batch_size = batch_size
+
+
+async def iter_documents(cursor, model: Type[BaseModel], batch_size: int) -> AsyncIterator[List[str]]:
+    """Yield serialised documents grouped into chunks of ``batch_size``."""
+    chunk = []
+    async for doc in cursor:
+        doc["id"] = str(doc["_id"])
+        chunk.append(model(**doc).json())
+        if len(chunk) >= batch_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+async def ndjson_body(cursor, model, batch_size) -> AsyncIterator[str]:
+    async for chunk in iter_documents(cursor, model, batch_size):
+        yield "\n".join(chunk) + "\n"
+
+
+async def json_array_body(cursor, model, batch_size) -> AsyncIterator[str]:
+    yield "["
+    separator = ""
+    async for chunk in iter_documents(cursor, model, batch_size):
+        yield separator + ",".join(chunk)
+        separator = ","
+    yield "]"
+
+
+def stream_documents(
+    collection,
+    query: dict,
+    model: Type[BaseModel],
+    params: ExportParams,
+    sort_field: Optional[str] = None,
+    filename: Optional[str] = None,
+) -> StreamingResponse:
+    """Stream every document matching ``query`` as NDJSON or a JSON array.
+
+    Documents are encoded as the Motor cursor yields them, so memory use is bounded
+    by ``batch_size`` rather than the size of the result.
+    """
+    cursor = collection.find(query).batch_size(params.batch_size)
+    if sort_field:
+        cursor = cursor.sort([(sort_field, 1), ("_id", 1)])
+
+    body = ndjson_body if params.format == "ndjson" else json_array_body
+    headers = {}
+    if filename:
+        extension = "ndjson" if params.format == "ndjson" else "json"
+        headers["Content-Disposition"] = f'attachment; filename="{filename}.{extension}"'
+    return StreamingResponse(
+        body(cursor, model, params.batch_size),
+        media_type=MEDIA_TYPES[params.format],
+        headers=headers,
+    )
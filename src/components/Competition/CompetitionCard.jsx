@@ -7,7 +7,7 @@ export default function CompetitionCard({ competition, onUpdate }) {
   const { user } = useAuth()
 
   const isOwner = competition.owner_id === user?.id
-  const memberCount = competition.competition_members?.length || 0
+  const memberCount = competition.member_count || 0
 
   return (
     <>
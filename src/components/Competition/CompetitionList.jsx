@@ -1,5 +1,6 @@
 import { useState, useEffect } from 'react'
 import { useAuth } from '../../contexts/AuthContext'
+import { fetchAllPages } from '../../lib/api'
 import CompetitionCard from './CompetitionCard'
 import CreateCompetition from './CreateCompetition'
 import './Competition.css'
@@ -22,28 +23,16 @@ export default function CompetitionList() {
   const fetchCompetitions = async () => {
     try {
       setLoading(true)
-      let url = `${API_URL}/competitions/`
+      let url = `${API_URL}/competitions/?include_members=true&limit=1000`
 
       if (filter === 'owned') {
-        url += `?owner_id=${user.id}`
+        url += `&owner_id=${user.id}`
       } else if (filter === 'member') {
-        url += `?member_id=${user.id}`
+        url += `&member_id=${user.id}`
       }
 
-      const response = await fetch(url)
-      if (!response.ok) throw new Error('Failed to fetch competitions')
-
-      const data = await response.json()
-
-      const enrichedData = await Promise.all(
-        data.map(async (comp) => {
-          const membersResponse = await fetch(`${API_URL}/members/competition/${comp.id}`)
-          const members = membersResponse.ok ? await membersResponse.json() : []
-          return { ...comp, competition_members: members }
-        })
-      )
-
-      setCompetitions(enrichedData)
+      const data = await fetchAllPages(url)
+      setCompetitions(data)
     } catch (error) {
       console.error('Error fetching competitions:', error)
     } finally {
@@ -1,4 +1,5 @@
 import { useState, useEffect } from 'react'
+import { fetchAllPages } from '../../lib/api'
 
 const API_URL = 'http://localhost:8000'
 
@@ -15,11 +16,8 @@ export default function ManageMembers({ competition, onClose, onUpdate }) {
 
   const fetchMembers = async () => {
     try {
-      const response = await fetch(`${API_URL}/members/competition/${competition.id}`)
-      if (!response.ok) throw new Error('Failed to fetch members')
-
-      const data = await response.json()
-      setMembers(data || [])
+      const data = await fetchAllPages(`${API_URL}/members/competition/${competition.id}?limit=1000`)
+      setMembers(data)
     } catch (err) {
       console.error('Error fetching members:', err)
     }
@@ -36,7 +34,7 @@ export default function ManageMembers({ competition, onClose, onUpdate }) {
       if (!response.ok) throw new Error('Failed to search users')
 
       const data = await response.json()
-      const currentMemberIds = members.map(m => m.user.user_id)
+      const currentMemberIds = members.map(m => m.user_id)
       const filteredResults = (data || []).filter(
         user => !currentMemberIds.includes(user.user_id)
       )
@@ -145,33 +143,37 @@ export default function ManageMembers({ competition, onClose, onUpdate }) {
           <div className="members-section">
             <h3>Current Members ({members.length})</h3>
             <div className="members-list">
-              {members.map((member) => (
-                <div key={member.id} className="member-item">
-                  <div className="member-avatar">
-                    {member.user.avatar_url ? (
-                      <img src={member.user.avatar_url} alt={member.user.full_name || 'User'} />
-                    ) : (
-                      <div className="avatar-placeholder-sm">
-                        {(member.user.full_name || member.user.email || 'U')[0].toUpperCase()}
-                      </div>
+              {members.map((member) => {
+                // Members whose profile no longer exists come back with user: null
+                const user = member.user || {}
+                return (
+                  <div key={member.id} className="member-item">
+                    <div className="member-avatar">
+                      {user.avatar_url ? (
+                        <img src={user.avatar_url} alt={user.full_name || 'User'} />
+                      ) : (
+                        <div className="avatar-placeholder-sm">
+                          {(user.full_name || user.email || 'U')[0].toUpperCase()}
+                        </div>
+                      )}
+                    </div>
+                    <div className="member-info">
+                      <strong>{user.full_name || 'User'}</strong>
+                      <span>{user.email || member.user_id}</span>
+                    </div>
+                    <span className={`role-badge ${member.role}`}>{member.role}</span>
+                    {member.role !== 'owner' && (
+                      <button
+                        onClick={() => removeMember(member.id)}
+                        className="btn btn-sm btn-danger"
+                        disabled={loading}
+                      >
+                        Remove
+                      </button>
                     )}
                   </div>
-                  <div className="member-info">
-                    <strong>{member.user.full_name || 'User'}</strong>
-                    <span>{member.user.email}</span>
-                  </div>
-                  <span className={`role-badge ${member.role}`}>{member.role}</span>
-                  {member.role !== 'owner' && (
-                    <button
-                      onClick={() => removeMember(member.id)}
-                      className="btn btn-sm btn-danger"
-                      disabled={loading}
-                    >
-                      Remove
-                    </button>
-                  )}
-                </div>
-              ))}
+                )
+              })}
             </div>
           </div>
         </div>
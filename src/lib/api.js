@@ -0,0 +1,19 @@
+// List endpoints return one page at a time and put the cursor for the next
+// page in the X-Next-Cursor header; follow it until the list is exhausted.
+export async function fetchAllPages(url) {
+  const items = []
+  let cursor = null
+
+  do {
+    const pageUrl = cursor
+      ? `${url}${url.includes('?') ? '&' : '?'}after=${encodeURIComponent(cursor)}`
+      : url
+    const response = await fetch(pageUrl)
+    if (!response.ok) throw new Error(`Request failed with status ${response.status}`)
+
+    items.push(...((await response.json()) || []))
+    cursor = response.headers.get('X-Next-Cursor')
+  } while (cursor)
+
+  return items
+}
@@ -0,0 +1,106 @@
+import asyncio
+import fnmatch
+import time
+
+
+class FakeRedis:
+    """The subset of redis.asyncio the cache and live update backends use, in memory.
+
+    Values come back as bytes like a real client without ``decode_responses``, and
+    ``round_trips`` counts the commands (or pipelines) sent.
+    """
+
+    def __init__(self):
+        self.values = {}
+        self.expiries = {}
+        self.round_trips = 0
+        self._pubsubs = []
+
+    def _live(self, key):
+        expires_at = self.expiries.get(key)
+        if expires_at is not None and expires_at <= time.monotonic():
+            self.values.pop(key, None)
+            self.expiries.pop(key, None)
+        return self.values.get(key)
+
+    def _set(self, key, value, px=None):
+        self.values[key] = value.encode() if isinstance(value, str) else value
+        if px is None:
+            self.expiries.pop(key, None)
+        else:
+            self.expiries[key] = time.monotonic() + px / 1000
+
+    async def get(self, key):
+        self.round_trips += 1
+        return self._live(key)
+
+    async def mget(self, keys):
+        self.round_trips += 1
+        return [self._live(key) for key in keys]
+
+    async def set(self, key, value, px=None):
+        self.round_trips += 1
+        self._set(key, value, px)
+
+    async def incr(self, key):
+        self.round_trips += 1
+        value = int(self._live(key) or 0) + 1
+        self.values[key] = str(value).encode()
+        return value
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    async def publish(self, channel, message):
+        self.round_trips += 1
+        for pubsub in self._pubsubs:
+            pubsub.deliver(channel, message)
+
+    def pubsub(self):
+        pubsub = FakePubSub()
+        self._pubsubs.append(pubsub)
+        return pubsub
+
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.commands = []
+
+    def set(self, key, value, px=None):
+        self.commands.append((key, value, px))
+        return self
+
+    async def execute(self):
+        self.client.round_trips += 1
+        for key, value, px in self.commands:
+            self.client._set(key, value, px)
+        self.commands = []
+
+
+class FakePubSub:
+    def __init__(self):
+        self.patterns = []
+        self.messages = asyncio.Queue()
+
+    async def psubscribe(self, pattern):
+        self.patterns.append(pattern)
+        self.messages.put_nowait({"type": "psubscribe", "channel": pattern.encode(), "data": 1})
+
+    def deliver(self, channel, message):
+        for pattern in self.patterns:
+            if fnmatch.fnmatchcase(channel, pattern):
+                self.messages.put_nowait({
+                    "type": "pmessage", "pattern": pattern.encode(),
+                    "channel": channel.encode(), "data": message.encode(),
+                })
+
+    async def listen(self):
+        while True:
+            yield await self.messages.get()
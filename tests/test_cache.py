@@ -0,0 +1,96 @@
+import asyncio
+from starlette.requests import Request
+from app.cache import MemoryCache, RedisCache, ResponseCache
+from tests.fakes import FakeRedis
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def make_request(path="/competitions/1", query=b"round=2"):
+    return Request({"type": "http", "method": "GET", "path": path, "query_string": query, "headers": []})
+
+
+def test_memory_cache_evicts_least_recently_used():
+    async def scenario():
+        cache = MemoryCache(max_entries=2)
+        await cache.set("a", "1", 60)
+        await cache.set("b", "2", 60)
+        await cache.get("a")
+        await cache.set("c", "3", 60)
+        return await cache.get_many(["a", "b", "c"]), cache.evictions, len(cache)
+
+    assert run(scenario()) == (["1", None, "3"], 1, 2)
+
+
+def test_memory_cache_expires_entries():
+    async def scenario():
+        cache = MemoryCache()
+        await cache.set("gone", "1", 0)
+        await cache.set("kept", "2", 60)
+        return await cache.get("gone"), await cache.get("kept")
+
+    assert run(scenario()) == (None, "2")
+
+
+def test_memory_cache_generations_survive_eviction():
+    async def scenario():
+        cache = MemoryCache(max_entries=1)
+        await cache.incr("competition:1")
+        await cache.set("a", "1", 60)
+        await cache.set("b", "2", 60)
+        return await cache.get_counters(["competition:1", "competition:2"])
+
+    assert run(scenario()) == [1, 0]
+
+
+def test_invalidate_retires_cached_keys():
+    async def scenario():
+        cache = ResponseCache(MemoryCache())
+        request = make_request()
+        before = await cache.key("standings", ["competition:1", "league_table:1"], request)
+        unrelated = await cache.key("standings", ["competition:2"], request)
+        await cache.invalidate("league_table:1")
+        after = await cache.key("standings", ["competition:1", "league_table:1"], request)
+        return before, after, unrelated, await cache.key("standings", ["competition:2"], request)
+
+    before, after, unrelated, unrelated_after = run(scenario())
+    assert before != after
+    assert unrelated == unrelated_after
+
+
+def test_redis_cache_round_trip():
+    async def scenario():
+        client = FakeRedis()
+        cache = RedisCache(client, prefix="t:")
+        await cache.set("a", "1", 60)
+        value = await cache.get("a")
+        await cache.incr("ns")
+        await cache.incr("ns")
+        return value, await cache.get_counters(["ns", "other"]), sorted(client.values)
+
+    assert run(scenario()) == ("1", [2, 0], ["t:a", "t:gen:ns"])
+
+
+def test_redis_cache_batches_reads_and_writes():
+    async def scenario():
+        client = FakeRedis()
+        cache = RedisCache(client)
+        await cache.set_many({f"k{i}": str(i) for i in range(50)}, 60)
+        writes = client.round_trips
+        values = await cache.get_many([f"k{i}" for i in range(50)] + ["missing"])
+        return writes, client.round_trips - writes, values
+
+    writes, reads, values = run(scenario())
+    assert (writes, reads) == (1, 1)
+    assert values == [str(i) for i in range(50)] + [None]
+
+
+def test_redis_cache_set_many_sets_expiries():
+    async def scenario():
+        cache = RedisCache(FakeRedis())
+        await cache.set_many({"a": "1", "b": "2"}, 0)
+        return await cache.get_many(["a", "b"])
+
+    assert run(scenario()) == [None, None]
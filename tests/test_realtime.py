@@ -0,0 +1,73 @@
+import asyncio
+import json
+from app.realtime import Broker, LocalBackend, RedisBackend, competition_channel, fixture_channel, publish_fixture_update
+from tests.fakes import FakeRedis
+
+
+def run(coro):
+    return asyncio.run(asyncio.wait_for(coro, timeout=5))
+
+
+async def drain(queue, count):
+    return [json.loads(await queue.get()) for _ in range(count)]
+
+
+def test_redis_backend_fans_out_to_every_worker():
+    async def scenario():
+        client = FakeRedis()
+        workers = [Broker(RedisBackend(client)), Broker(RedisBackend(client))]
+        for broker in workers:
+            await broker.start()
+        await asyncio.sleep(0)
+        try:
+            async with workers[0].subscribe(competition_channel("c1")) as first, \
+                    workers[1].subscribe(fixture_channel("f1")) as second:
+                await publish_fixture_update(workers[0], {"_id": "f1", "competition_id": "c1", "is_complete": True})
+                return await drain(first, 1), await drain(second, 1)
+        finally:
+            for broker in workers:
+                await broker.stop()
+
+    first, second = run(scenario())
+    assert first == second
+    assert first[0]["fixture_id"] == "f1" and first[0]["is_complete"] is True
+
+
+def test_redis_backend_strips_its_prefix():
+    async def scenario():
+        client = FakeRedis()
+        backend = RedisBackend(client, prefix="p:")
+        received = asyncio.ensure_future(backend.listen().__anext__())
+        await asyncio.sleep(0)
+        await backend.publish("competition:c1", "hello")
+        return await received, client._pubsubs[0].patterns
+
+    assert run(scenario()) == (("competition:c1", "hello"), ["p:*"])
+
+
+def test_slow_subscriber_loses_oldest_messages():
+    async def scenario():
+        broker = Broker(LocalBackend(), queue_size=2)
+        await broker.start()
+        try:
+            async with broker.subscribe("c") as queue:
+                for i in range(3):
+                    await broker.publish({"n": i}, "c")
+                while broker.backend._queue.qsize():
+                    await asyncio.sleep(0)
+                await asyncio.sleep(0)
+                return await drain(queue, queue.qsize())
+        finally:
+            await broker.stop()
+
+    assert run(scenario()) == [{"n": 1}, {"n": 2}]
+
+
+def test_unsubscribed_channels_are_dropped():
+    async def scenario():
+        broker = Broker(LocalBackend())
+        async with broker.subscribe("a", "b"):
+            subscribed = set(broker._subscribers)
+        return subscribed, dict(broker._subscribers)
+
+    assert run(scenario()) == ({"a", "b"}, {})
@@ -0,0 +1,75 @@
+import asyncio
+from app.search import MemoryProfileSearch, normalise, search_keys
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def names(profiles):
+    return [profile["full_name"] for profile in profiles]
+
+
+async def indexed(*profiles):
+    search = MemoryProfileSearch()
+    for i, profile in enumerate(profiles):
+        await search.index(None, {"_id": f"p{i}", **profile})
+    return search
+
+
+def test_keys_are_accent_and_case_free():
+    assert normalise("  Zoë ÅNGSTRÖM ") == "zoe angstrom"
+    assert search_keys({"full_name": "Zoë Ångström", "email": "Zoe@Example.com"}) == [
+        "angstrom", "example.com", "zoe", "zoe angstrom", "zoe@example.com",
+    ]
+
+
+def test_prefix_search_ranks_exact_keys_first():
+    async def scenario():
+        search = await indexed(
+            {"full_name": "Annabel Lee", "email": "annabel@x.com"},
+            {"full_name": "Ann Smith", "email": "ann@x.com"},
+            {"full_name": "Bob Stone", "email": "bob@x.com"},
+        )
+        return names(await search.search(None, "ANN", 10)), names(await search.search(None, "ann s", 10))
+
+    assert run(scenario()) == (["Ann Smith", "Annabel Lee"], ["Ann Smith"])
+
+
+def test_limit_applies_after_ranking():
+    async def scenario():
+        profiles = [{"full_name": f"Anna{i:02d}"} for i in range(20)] + [{"full_name": "Ann"}]
+        search = await indexed(*profiles)
+        return names(await search.search(None, "ann", 3))
+
+    assert run(scenario()) == ["Ann", "Anna00", "Anna01"]
+
+
+def test_reindex_replaces_old_keys():
+    async def scenario():
+        search = await indexed({"full_name": "Old Name", "email": "old@x.com"})
+        await search.index(None, {"_id": "p0", "full_name": "New Name", "email": "new@x.com"})
+        return names(await search.search(None, "old", 10)), names(await search.search(None, "new", 10))
+
+    assert run(scenario()) == ([], ["New Name"])
+
+
+def test_remove_prunes_the_profile_everywhere():
+    async def scenario():
+        search = await indexed({"full_name": "Ann Smith"}, {"full_name": "Ann Jones"})
+        await search.remove(None, {"_id": "p0"})
+        await search.remove(None, {"_id": "missing"})
+        return names(await search.search(None, "ann", 10)), search.root.ids, list(search.profiles)
+
+    found, root_ids, profiles = run(scenario())
+    assert found == ["Ann Jones"]
+    assert root_ids == {"p1"}
+    assert profiles == ["p1"]
+
+
+def test_blank_query_matches_nothing():
+    async def scenario():
+        search = await indexed({"full_name": "Ann Smith"})
+        return await search.search(None, "   ", 10)
+
+    assert run(scenario()) == []